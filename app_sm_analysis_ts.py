@@ -119,7 +119,8 @@ def main():
             geo_dict=data_static_collection,
             tmp_dict=data_settings['tmp'],
             template_tags_dict=data_settings['algorithm']['template'],
-            flag_data_updating=data_settings['algorithm']['flags']['updating_ancillary_dynamic_point'])
+            flag_data_updating=data_settings['algorithm']['flags']['updating_ancillary_dynamic_point'],
+            flag_data_incremental=data_settings['algorithm']['flags'].get('incremental_ancillary_dynamic_point', False))
         driver_data_dynamic_point.organize_data()
 
         # Soil moisture grid datasets
@@ -132,7 +133,9 @@ def main():
             geo_dict=data_static_collection,
             tmp_dict=data_settings['tmp'],
             template_tags_dict=data_settings['algorithm']['template'],
-            flag_data_updating=data_settings['algorithm']['flags']['updating_ancillary_dynamic_grid'])
+            flag_data_updating=data_settings['algorithm']['flags']['updating_ancillary_dynamic_grid'],
+            flag_data_incremental=data_settings['algorithm']['flags'].get('incremental_ancillary_dynamic_grid', False),
+            dst_dict=data_settings['data']['dynamic']['destination'])
         driver_data_dynamic_grid.organize_data()
 
         # Soil moisture analysis
@@ -0,0 +1,159 @@
+#!/usr/bin/python3
+"""
+ARPAL Analysis Tool - SM GRID REPACK
+__date__ = '20221125'
+__version__ = '1.0.0'
+__author__ =
+        'Fabio Delogu (fabio.delogu@cimafoundation.org',
+        'Francesco Silvestro (francesco.silvestro@cimafoundation.org)',
+        'Francesco Avanzi (francesco.avanzi@cimafoundation.org)'
+
+__library__ = 'SM'
+
+General command line:
+python3 app_sm_repack_grid.py -settings_file configuration.json
+
+Version(s):
+20221125 (1.0.0) --> Beta release
+"""
+
+# -------------------------------------------------------------------------------------
+# Complete library
+import logging
+import time
+import os
+
+from driver_data_io_static import DriverData as DriverData_Static
+from driver_data_io_dynamic_grid import DriverData as DriverData_Dynamic_Grid
+
+from argparse import ArgumentParser
+
+from lib_data_io_json import read_file_json
+from lib_utils_time import set_time
+from lib_utils_logging import set_logging_file
+from lib_info_args import logger_name
+
+# Logging
+log_stream = logging.getLogger(logger_name)
+# -------------------------------------------------------------------------------------
+
+# -------------------------------------------------------------------------------------
+# Algorithm information
+alg_version = '1.0.0'
+alg_release = '2022-11-25'
+alg_name = 'SM GRID REPACK'
+# Algorithm parameter(s)
+time_format = '%Y-%m-%d %H:%M'
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Script Main
+def main():
+
+    # -------------------------------------------------------------------------------------
+    # Get algorithm settings
+    alg_settings, alg_time = get_args()
+
+    # Set algorithm settings
+    data_settings = read_file_json(alg_settings)
+
+    # Set algorithm logging
+    set_logging_file(
+        logger_name=logger_name,
+        logger_file=os.path.join(data_settings['log']['folder_name'], data_settings['log']['file_name']))
+
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # Info algorithm
+    log_stream.info(' ============================================================================ ')
+    log_stream.info(' ==> ' + alg_name + ' (Version: ' + alg_version + ' Release_Date: ' + alg_release + ')')
+    log_stream.info(' ==> START ... ')
+    log_stream.info(' ')
+
+    # Time algorithm information
+    start_time = time.time()
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # Organize time run
+    time_reference, time_range = set_time(
+        time_ref_args=alg_time,
+        time_ref_file=data_settings['time']['time_reference'],
+        time_ref_file_start=data_settings['time']['time_start'],
+        time_ref_file_end=data_settings['time']['time_end'],
+        time_format=time_format,
+        time_period=data_settings['time']['time_period'],
+        time_frequency=data_settings['time']['time_frequency'],
+        time_rounding=data_settings['time']['time_rounding']
+    )
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # Geographical datasets
+    driver_data_static = DriverData_Static(
+        src_dict=data_settings['data']['static']['source'],
+        anc_dict=data_settings['data']['static']['ancillary'],
+        alg_dict=data_settings['algorithm']['ancillary'],
+        tmp_dict=data_settings['tmp'],
+        template_tags_dict=data_settings['algorithm']['template'],
+        flag_data_updating=data_settings['algorithm']['flags']['updating_ancillary_static'])
+    data_static_collection = driver_data_static.organize_data()
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # Soil moisture grid datasets (repack in the grid cube file)
+    driver_data_dynamic_grid = DriverData_Dynamic_Grid(
+        time_reference, time_reference,
+        src_dict=data_settings['data']['dynamic']['source'],
+        anc_dict=data_settings['data']['dynamic']['ancillary'],
+        alg_dict=data_settings['algorithm']['ancillary'],
+        time_dict=data_settings['data']['dynamic']['time'],
+        geo_dict=data_static_collection,
+        tmp_dict=data_settings['tmp'],
+        template_tags_dict=data_settings['algorithm']['template'],
+        flag_data_updating=False,
+        repack_dict=data_settings['data']['dynamic']['repack']['grid'])
+    driver_data_dynamic_grid.repack_data()
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # Info algorithm
+    time_elapsed = round(time.time() - start_time, 1)
+
+    log_stream.info(' ')
+    log_stream.info(' ==> ' + alg_name + ' (Version: ' + alg_version + ' Release_Date: ' + alg_release + ')')
+    log_stream.info(' ==> TIME ELAPSED: ' + str(time_elapsed) + ' seconds')
+    log_stream.info(' ==> ... END')
+    log_stream.info(' ==> Bye, Bye')
+    log_stream.info(' ============================================================================ ')
+    # -------------------------------------------------------------------------------------
+
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to get script argument(s)
+def get_args():
+    parser_handle = ArgumentParser()
+    parser_handle.add_argument('-settings_file', action="store", dest="alg_settings")
+    parser_handle.add_argument('-time', action="store", dest="alg_time")
+    parser_values = parser_handle.parse_args()
+
+    alg_settings, alg_time = 'configuration.json', None
+    if parser_values.alg_settings:
+        alg_settings = parser_values.alg_settings
+    if parser_values.alg_time:
+        alg_time = parser_values.alg_time
+
+    return alg_settings, alg_time
+
+# -------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------
+# Call script from external library
+if __name__ == '__main__':
+    main()
+# ----------------------------------------------------------------------------
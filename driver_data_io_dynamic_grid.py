@@ -11,14 +11,24 @@ Version:       '1.5.0'
 # Library
 import logging
 import os
+import time
+import numpy as np
 import pandas as pd
 
 from copy import deepcopy
 
-from lib_data_io_pickle import write_obj
-from lib_utils_data_grid import get_data_nc, get_data_binary, extract_data_grid2point, join_data_point
-
-from lib_utils_system import unzip_filename, fill_tags2string, make_folder, change_extension
+from lib_data_io_pickle import read_obj, write_obj
+from lib_data_io_nc import write_file_stats
+from lib_utils_data_grid import compute_data_limit, compute_data_window, \
+    compute_data_chunk, compute_data_chunk_by_process, compute_data_cube, repack_data_cube, \
+    create_data_collection, join_data_collection, convert_data_collection, define_data_zones_columns
+from lib_utils_process import define_process_settings, split_process_chunks, run_process_pool, emit_process_logs
+
+from lib_utils_data_point import sync_data_series
+from lib_utils_inventory import update_file_inventory, summarize_file_gaps
+from lib_utils_stats import merge_data_stats, compute_data_stats_maps, merge_data_corr, compute_data_corr_maps
+from lib_utils_cache import define_cache_tag
+from lib_utils_system import fill_tags2string, make_folder
 from lib_utils_time import define_time_range
 
 from lib_info_args import logger_name, zip_extension
@@ -42,13 +52,14 @@ class DriverData:
                  geo_dict=None, time_dict=None, tmp_dict=None,
                  template_tags_dict=None,
                  flag_data_src='grid',
-                 flag_data_updating=True):
+                 flag_data_updating=True, flag_data_incremental=False, repack_dict=None, dst_dict=None):
 
         self.time_step = pd.Timestamp(time_step)
         self.time_reference = pd.Timestamp(time_reference)
 
         self.src_dict = src_dict
         self.anc_dict = anc_dict
+        self.dst_dict = dst_dict
         self.alg_dict = alg_dict
         self.geo_dict = geo_dict
         self.tmp_dict = tmp_dict
@@ -59,11 +70,27 @@ class DriverData:
         self.folder_name_tag = 'folder_name'
         self.file_type_tag = 'obj_type'
         self.file_compression_tag = 'obj_compression'
+        self.file_reader_tag = 'obj_reader'
+        self.file_sampling_tag = 'obj_sampling'
+        self.file_output_tag = 'obj_output'
+        self.file_variables_tag = 'obj_variables'
+        self.file_name_variable_tag = 'file_name_variable'
 
         self.grid_terrain_tag = 'terrain'
         self.grid_cn_tag = 'cn'
         self.grid_cnet_tag = 'channels_network'
         self.points_registry_tag = 'stations_registry'
+        self.grid_vmax_tag = 'vmax'
+        self.grid_mask_valid_tag = 'mask_valid'
+        self.grid_mask_boundary_tag = 'mask_boundary'
+        self.points_operator_tag = 'stations_operator'
+        self.inventory_tag = 'inventory'
+        self.checkpoint_tag = 'checkpoint'
+        self.checkpoint_interval_tag = 'time_interval'
+        self.grid_zones_tag = 'zones'
+        self.grid_stats_tag = 'stats'
+        self.grid_corr_tag = 'correlation'
+        self.points_tag = 'point'
 
         self.geo_x_tag = 'Longitude'
         self.geo_y_tag = 'Latitude'
@@ -79,6 +106,8 @@ class DriverData:
         self.alg_point_geo_spatial_mask = alg_dict['geo_spatial_mask']
         self.alg_point_geo_temporal_window = alg_dict['geo_temporal_window']
         self.alg_point_geo_temporal_operation = alg_dict['geo_temporal_operation']
+        self.process_mode, self.process_workers, self.process_chunk, self.process_prefetch = \
+            define_process_settings(alg_dict)
 
         # time object(s)
         self.time_dict = time_dict[self.flag_data_src]
@@ -86,6 +115,10 @@ class DriverData:
 
         # source object(s)
         self.file_type_src = src_dict[self.flag_data_src][self.file_type_tag]
+        self.file_reader_src = src_dict[self.flag_data_src].get(self.file_reader_tag, 'file')
+        self.file_sampling_src = src_dict[self.flag_data_src].get(self.file_sampling_tag, 'grid')
+        self.file_output_src = src_dict[self.flag_data_src].get(self.file_output_tag, 'data_array')
+        self.file_variables_src = src_dict[self.flag_data_src].get(self.file_variables_tag, None)
         self.folder_name_src_raw = self.src_dict[self.flag_data_src][self.folder_name_tag]
         self.file_name_src_raw = self.src_dict[self.flag_data_src][self.file_name_tag]
 
@@ -99,14 +132,90 @@ class DriverData:
         self.file_path_anc = self.collect_file_list(
             self.folder_name_anc_raw, self.file_name_anc_raw, file_time_range=pd.DatetimeIndex([self.time_reference]))
 
+        # ancillary object(s) of the other variable(s) (optional; file names defined for each variable)
+        self.file_name_anc_var_raw = anc_dict[self.flag_data_src].get(self.file_name_variable_tag, None)
+
+        # checkpoint object(s) (optional; disabled by a null file name)
+        self.file_path_checkpoint, self.checkpoint_interval = None, None
+        if anc_dict.get(self.checkpoint_tag, {}).get(self.file_name_tag, None) is not None:
+            self.checkpoint_interval = anc_dict[self.checkpoint_tag].get(self.checkpoint_interval_tag, 600)
+            self.file_path_checkpoint = fill_tags2string(
+                os.path.join(anc_dict[self.checkpoint_tag][self.folder_name_tag],
+                             anc_dict[self.checkpoint_tag][self.file_name_tag]),
+                self.template_tags_dict, {'catchment_name': self.alg_catchment_name})[0]
+
+        # zones object(s) (optional; series of the zonal statistics; disabled by a null file name)
+        self.file_path_zones = None
+        if anc_dict.get(self.grid_zones_tag, {}).get(self.file_name_tag, None) is not None:
+            self.file_path_zones = fill_tags2string(
+                os.path.join(anc_dict[self.grid_zones_tag][self.folder_name_tag],
+                             anc_dict[self.grid_zones_tag][self.file_name_tag]),
+                self.template_tags_dict, {'catchment_name': self.alg_catchment_name, 'zone_name': None})[0]
+
+        # stats object(s) (optional; accumulator in the ancillary folder and maps in the destination folder;
+        # disabled by a null file name)
+        self.file_path_stats_anc, self.file_path_stats_dst, self.stats_season = None, None, False
+        if anc_dict.get(self.grid_stats_tag, {}).get(self.file_name_tag, None) is not None:
+            self.file_path_stats_anc = fill_tags2string(
+                os.path.join(anc_dict[self.grid_stats_tag][self.folder_name_tag],
+                             anc_dict[self.grid_stats_tag][self.file_name_tag]),
+                self.template_tags_dict, {'catchment_name': self.alg_catchment_name})[0]
+        if (dst_dict is not None) and (dst_dict.get(self.grid_stats_tag, {}).get(self.file_name_tag, None) is not None):
+            self.file_path_stats_dst = fill_tags2string(
+                os.path.join(dst_dict[self.grid_stats_tag][self.folder_name_tag],
+                             dst_dict[self.grid_stats_tag][self.file_name_tag]),
+                self.template_tags_dict, {'catchment_name': self.alg_catchment_name})[0]
+            self.stats_season = dst_dict[self.grid_stats_tag].get('season', False)
+
+        # correlation object(s) (optional; accumulator in the ancillary folder and maps in the destination folder;
+        # point series in the ancillary point folder; disabled by a null file name)
+        self.file_path_corr_anc, self.file_path_corr_dst, self.corr_count_min = None, None, 3
+        if anc_dict.get(self.grid_corr_tag, {}).get(self.file_name_tag, None) is not None:
+            self.file_path_corr_anc = fill_tags2string(
+                os.path.join(anc_dict[self.grid_corr_tag][self.folder_name_tag],
+                             anc_dict[self.grid_corr_tag][self.file_name_tag]),
+                self.template_tags_dict, {'catchment_name': self.alg_catchment_name})[0]
+        if (dst_dict is not None) and (dst_dict.get(self.grid_corr_tag, {}).get(self.file_name_tag, None) is not None):
+            self.file_path_corr_dst = fill_tags2string(
+                os.path.join(dst_dict[self.grid_corr_tag][self.folder_name_tag],
+                             dst_dict[self.grid_corr_tag][self.file_name_tag]),
+                self.template_tags_dict, {'catchment_name': self.alg_catchment_name})[0]
+            self.corr_count_min = dst_dict[self.grid_corr_tag].get('count_min', 3)
+        self.file_path_corr_point_raw = None
+        if self.points_tag in anc_dict:
+            self.file_path_corr_point_raw = os.path.join(
+                anc_dict[self.points_tag][self.folder_name_tag], anc_dict[self.points_tag][self.file_name_tag])
+
+        # season filter (same groups of the analysis)
+        self.lut_data_season = None
+        if self.stats_season:
+            self.lut_data_season = {
+                1: 'DJF', 2: 'DJF', 3: 'MAM', 4: 'MAM', 5: 'MAM', 6: 'JJA',
+                7: 'JJA', 8: 'JJA', 9: 'SON', 10: 'SON', 11: 'SON', 12: 'DJF'}
+
+        # inventory object(s) (optional; disabled by a null file name)
+        self.file_path_inventory = None
+        if anc_dict.get(self.inventory_tag, {}).get(self.file_name_tag, None) is not None:
+            self.file_path_inventory = fill_tags2string(
+                os.path.join(anc_dict[self.inventory_tag][self.folder_name_tag],
+                             anc_dict[self.inventory_tag][self.file_name_tag]),
+                self.template_tags_dict, {'catchment_name': self.alg_catchment_name})[0]
+
         # tmp object(s)
         self.folder_name_tmp_raw = tmp_dict[self.folder_name_tag]
         self.file_name_tmp_raw = tmp_dict[self.file_name_tag]
+        self.cache_active_tmp = tmp_dict.get('cache_active', False)
+        self.cache_size_max_tmp = tmp_dict.get('cache_size_max', None)
+        self.folder_name_cache_tmp = os.path.join(self.folder_name_tmp_raw, 'cache', 'grid')
 
         self.file_extension_zip = zip_extension
         self.file_extension_unzip = 'bin'
 
         self.flag_data_updating = flag_data_updating
+        self.flag_data_incremental = flag_data_incremental
+
+        # repack object(s)
+        self.repack_dict = repack_dict
 
     # -------------------------------------------------------------------------------------
 
@@ -123,7 +232,7 @@ class DriverData:
         if '*' in file_name_raw:
 
             template_values_step = {'catchment_name': catchment_name,
-                                    'point_code': None, 'point_name': None,
+                                    'point_code': None, 'point_name': None, 'var_name': None,
                                     'time_start': None, 'time_end': None}
 
             folder_obj_def = fill_tags2string(
@@ -154,7 +263,8 @@ class DriverData:
                                         'time_start': None,
                                         'time_end': None,
                                         'point_code': None,
-                                        'point_name': None}
+                                        'point_name': None,
+                                        'var_name': None}
 
                 folder_tags_def = fill_tags2string(
                     folder_name_raw, self.template_tags_dict, template_values_step)
@@ -184,6 +294,572 @@ class DriverData:
 
     # -------------------------------------------------------------------------------------
 
+    # -------------------------------------------------------------------------------------
+    # Method to define the source variable(s) (the first variable is the soil moisture used by the analysis; the
+    # soil moisture variable of the grid files is used if the variables are not defined)
+    def define_data_variables(self, var_name='SM', var_min=0.0, var_max=1.0, var_scale_factor=100.0):
+
+        file_type_src = self.file_type_src
+        file_variables_src = self.file_variables_src
+
+        if file_variables_src is None:
+            file_variables_src = [{'var_name': var_name}]
+
+        var_list = []
+        for var_obj in file_variables_src:
+            if 'var_name' not in var_obj:
+                log_stream.error(' ===> Source variable must be defined by the "var_name" key')
+                raise IOError('Source variable name is not defined')
+            var_list.append({'var_name': var_obj['var_name'],
+                             'var_min': var_obj.get('var_min', var_min),
+                             'var_max': var_obj.get('var_max', var_max),
+                             'var_scale_factor': var_obj.get('var_scale_factor', var_scale_factor)})
+
+        if var_list.__len__() == 0:
+            log_stream.error(' ===> Source variables list is empty')
+            raise IOError('Source variables must be defined by one or more elements')
+
+        if var_list.__len__() > 1:
+            if file_type_src == 'grid_binary':
+                log_stream.error(' ===> Source data type "grid_binary" is defined by one variable only')
+                raise NotImplementedError('Multiple variables are available only for "grid_nc" type.')
+            elif file_type_src == 'grid_cube':
+                log_stream.warning(' ===> Source data type "grid_cube" is defined by one variable only. '
+                                   'Only the variable "' + var_list[0]['var_name'] + '" is used')
+                var_list = var_list[:1]
+            elif self.file_name_anc_var_raw is None:
+                log_stream.error(' ===> Ancillary "' + self.file_name_variable_tag +
+                                 '" must be defined for multiple variables')
+                raise IOError('Ancillary file of the variables is not defined')
+
+        return var_list
+
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # Method to define the ancillary file of the variable(s) (the first variable uses the soil moisture file; the
+    # other variable(s) use the variable template filled for each point)
+    def define_data_anc(self, var_list):
+
+        file_path_anc_dict = {}
+        for var_id, var_obj in enumerate(var_list):
+            if var_id == 0:
+                file_path_anc_dict[var_obj['var_name']] = self.file_path_anc
+            else:
+                file_path_anc_dict[var_obj['var_name']] = os.path.join(
+                    self.folder_name_anc_raw, self.file_name_anc_var_raw)
+
+        return file_path_anc_dict
+
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # Method to define the ancillary file of a variable and a point
+    def define_data_anc_point(self, file_path_anc_raw, var_name, point_name, point_code):
+
+        template_values_dict = {'catchment_name': self.alg_catchment_name, 'var_name': var_name,
+                                'point_code': point_code, 'point_name': point_name,
+                                'ancillary_sub_path_time_grid': self.time_reference,
+                                'ancillary_datetime_grid': self.time_reference}
+        file_path_anc_def = fill_tags2string(file_path_anc_raw, self.template_tags_dict, template_values_dict)[0]
+
+        return file_path_anc_def
+
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # Method to define the ancillary file of the zone(s) (label grids defined by the static datasets)
+    def define_data_zones(self):
+
+        geo_zones = self.geo_dict.get(self.grid_zones_tag, None)
+        if not geo_zones:
+            return {}
+
+        if self.file_path_zones is None:
+            log_stream.warning(' ===> Ancillary "' + self.grid_zones_tag + '" is not defined. '
+                               'The zonal statistics are not computed')
+            return {}
+        if self.file_type_src == 'grid_cube':
+            log_stream.warning(' ===> Zonal statistics are not available for "grid_cube" type. '
+                               'The zonal statistics are not computed')
+            return {}
+
+        file_path_zones_dict = {}
+        for zone_name in geo_zones.keys():
+            file_path_zones_dict[zone_name] = fill_tags2string(
+                self.file_path_zones, self.template_tags_dict, {'zone_name': zone_name})[0]
+
+        return file_path_zones_dict
+
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # Method to define the files of the pixel statistics (accumulator and maps)
+    def define_data_stats(self):
+
+        if self.file_path_stats_dst is None:
+            return None, None
+
+        if self.file_path_stats_anc is None:
+            log_stream.warning(' ===> Ancillary "' + self.grid_stats_tag + '" is not defined. '
+                               'The pixel statistics are not computed')
+            return None, None
+        if self.file_type_src == 'grid_cube':
+            log_stream.warning(' ===> Pixel statistics are not available for "grid_cube" type. '
+                               'The pixel statistics are not computed')
+            return None, None
+
+        return self.file_path_stats_anc, self.file_path_stats_dst
+
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # Method to read the accumulator of the pixel statistics (only if defined by the same groups)
+    def read_data_stats(self, file_path_stats_anc):
+
+        stats_archive = None
+        if os.path.exists(file_path_stats_anc):
+            stats_archive = read_obj(file_path_stats_anc)
+            if (stats_archive is not None) and (stats_archive['lut'] != self.lut_data_season):
+                log_stream.warning(' ===> Pixel statistics "' + file_path_stats_anc +
+                                   '" are defined by different groups; all the time steps are computed')
+                stats_archive = None
+
+        return stats_archive
+
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # Method to define the files of the correlation maps (accumulator and maps)
+    def define_data_corr(self):
+
+        if self.file_path_corr_dst is None:
+            return None, None
+
+        if self.file_path_corr_anc is None:
+            log_stream.warning(' ===> Ancillary "' + self.grid_corr_tag + '" is not defined. '
+                               'The correlation maps are not computed')
+            return None, None
+        if self.file_path_corr_point_raw is None:
+            log_stream.warning(' ===> Ancillary "' + self.points_tag + '" is not defined. '
+                               'The correlation maps are not computed')
+            return None, None
+        if self.file_type_src == 'grid_cube':
+            log_stream.warning(' ===> Correlation maps are not available for "grid_cube" type. '
+                               'The correlation maps are not computed')
+            return None, None
+
+        return self.file_path_corr_anc, self.file_path_corr_dst
+
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # Method to define the cells of the correlation maps (valid cells not on the domain boundaries)
+    def define_data_corr_cells(self):
+
+        geo_da_mask_valid = self.geo_dict[self.grid_mask_valid_tag]
+        geo_da_mask_boundary = self.geo_dict[self.grid_mask_boundary_tag]
+
+        geo_mask_cells = np.logical_and(geo_da_mask_valid.values, np.logical_not(geo_da_mask_boundary.values))
+
+        return np.flatnonzero(geo_mask_cells.ravel())
+
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # Method to read the accumulator of the correlation maps (only if defined by the same points and cells)
+    def read_data_corr(self, file_path_corr_anc, point_names, cell_index):
+
+        corr_archive = None
+        if os.path.exists(file_path_corr_anc):
+            corr_archive = read_obj(file_path_corr_anc)
+            if (corr_archive is not None) and \
+                    ((corr_archive['points'] != list(point_names)) or
+                     (not np.array_equal(corr_archive['index'], cell_index))):
+                log_stream.warning(' ===> Correlation maps "' + file_path_corr_anc +
+                                   '" are defined by different points or cells; all the time steps are computed')
+                corr_archive = None
+
+        return corr_archive
+
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # Method to get the point series synchronized to the time range (same temporal window of the analysis)
+    def get_data_corr_points(self, time_range, point_dframe_registry):
+
+        point_names, point_values = [], []
+        for point_id, point_row in point_dframe_registry.iterrows():
+            point_name, point_code = point_row['point_name'], point_row['point_code']
+            template_values_dict = {'point_code': point_code, 'point_name': point_name}
+            file_path_point = fill_tags2string(self.file_path_corr_point_raw,
+                                               self.template_tags_dict, template_values_dict)[0]
+
+            point_series = None
+            if os.path.exists(file_path_point):
+                point_series = read_obj(file_path_point)
+
+            if point_series is not None:
+                point_values.append(sync_data_series(
+                    point_series, time_range,
+                    temporal_window=self.alg_point_geo_temporal_window,
+                    temporal_operation=self.alg_point_geo_temporal_operation))
+            else:
+                log_stream.warning(' ===> Point series "' + file_path_point + '" is not available. '
+                                   'The correlation maps of the point "' + point_name + '" are not defined')
+                point_values.append(np.full(time_range.shape[0], np.nan))
+            point_names.append(point_name)
+
+        return point_names, np.stack(point_values, axis=1)
+
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # Method to search the time steps not covered by the ancillary point series (of all the variables), by the
+    # ancillary zone series and by the accumulators of the pixel statistics and of the correlation maps
+    def search_data_time(self, time_range, point_dframe_registry, file_path_anc_dict, file_path_zones_dict=None,
+                         stats_archive=None, flag_stats=False, corr_archive=None, flag_corr=False):
+
+        if file_path_zones_dict is None:
+            file_path_zones_dict = {}
+
+        point_archive, time_range_missing = {}, pd.DatetimeIndex([])
+        for var_name, file_path_anc_raw in file_path_anc_dict.items():
+            point_archive[var_name] = {}
+            for point_id, point_row in point_dframe_registry.iterrows():
+                point_name, point_code = point_row['point_name'], point_row['point_code']
+                file_path_anc_tmp = self.define_data_anc_point(file_path_anc_raw, var_name, point_name, point_code)
+
+                point_series = None
+                if os.path.exists(file_path_anc_tmp):
+                    point_series = read_obj(file_path_anc_tmp)
+
+                if point_series is not None:
+                    point_time_missing = time_range.difference(point_series.index)
+                else:
+                    # point (or variable) added to the registry (all the time steps must be computed)
+                    point_time_missing = time_range
+
+                point_archive[var_name][point_name] = point_series
+                time_range_missing = time_range_missing.union(point_time_missing)
+
+        zone_archive = {}
+        for zone_name, file_path_zone in file_path_zones_dict.items():
+
+            zone_dframe = None
+            if os.path.exists(file_path_zone):
+                zone_dframe = read_obj(file_path_zone)
+
+            if zone_dframe is not None:
+                zone_time_missing = time_range.difference(zone_dframe.index)
+            else:
+                # zone added to the static datasets (all the time steps must be computed)
+                zone_time_missing = time_range
+
+            zone_archive[zone_name] = zone_dframe
+            time_range_missing = time_range_missing.union(zone_time_missing)
+
+        # time steps not accumulated by the pixel statistics
+        if flag_stats:
+            stats_time = pd.DatetimeIndex(stats_archive['time'] if stats_archive is not None else [])
+            time_range_missing = time_range_missing.union(time_range.difference(stats_time))
+        # time steps not accumulated by the correlation maps
+        if flag_corr:
+            corr_time = pd.DatetimeIndex(corr_archive['time'] if corr_archive is not None else [])
+            time_range_missing = time_range_missing.union(time_range.difference(corr_time))
+
+        # keep the order of the time range
+        time_range_missing = time_range[time_range.isin(time_range_missing)]
+
+        return time_range_missing, point_archive, zone_archive
+
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # Method to read the checkpoint (only if defined by the same time range, points and settings)
+    def read_data_checkpoint(self, checkpoint_key, point_collections, chunk_n):
+
+        file_path_checkpoint = self.file_path_checkpoint
+
+        chunk_completed = []
+        checkpoint_obj = read_obj(file_path_checkpoint)
+        if checkpoint_obj is not None:
+            if checkpoint_obj['key'] == checkpoint_key:
+                point_collections, chunk_completed = checkpoint_obj['collections'], checkpoint_obj['chunks']
+                log_stream.info(' -----> Checkpoint: ' + str(chunk_completed.__len__()) + ' of ' + str(chunk_n) +
+                                ' time chunks completed by a previous run')
+            else:
+                log_stream.warning(' ===> Checkpoint "' + file_path_checkpoint +
+                                   '" is defined by different time range or settings; it is ignored')
+
+        return point_collections, chunk_completed
+
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # Method to write the checkpoint
+    def write_data_checkpoint(self, checkpoint_key, point_collections, chunk_completed):
+
+        file_path_checkpoint = self.file_path_checkpoint
+
+        folder_name_checkpoint, file_name_checkpoint = os.path.split(file_path_checkpoint)
+        make_folder(folder_name_checkpoint)
+
+        write_obj(file_path_checkpoint,
+                  {'key': checkpoint_key, 'chunks': chunk_completed, 'collections': point_collections})
+
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # Method to search the available source files (by the inventory of the source folders)
+    def search_data_files(self, time_range, file_path_src):
+
+        file_path_inventory = self.file_path_inventory
+
+        file_inventory = None
+        if os.path.exists(file_path_inventory):
+            file_inventory = read_obj(file_path_inventory)
+
+        file_flags, file_inventory, folder_scanned = update_file_inventory(file_path_src, file_inventory)
+
+        folder_name_inventory, file_name_inventory = os.path.split(file_path_inventory)
+        make_folder(folder_name_inventory)
+        write_obj(file_path_inventory, file_inventory)
+
+        log_stream.info(' -----> Inventory: ' + str(int(file_flags.sum())) + ' of ' + str(file_flags.shape[0]) +
+                        ' source files available [folders scanned: ' + str(folder_scanned) + ']')
+        if not np.all(file_flags):
+            gap_n, gap_summary = summarize_file_gaps(time_range, file_flags)
+            log_stream.warning(' ===> Source files are not available for ' + str(int((~file_flags).sum())) +
+                               ' time steps in ' + str(gap_n) + ' periods: ' + gap_summary)
+
+        time_range = time_range[file_flags]
+        file_path_src = [file_path_step for file_path_step, file_flag in zip(file_path_src, file_flags) if file_flag]
+
+        return time_range, file_path_src
+
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # Method to define the static and the settings datasets (shared by the time chunk(s))
+    def define_data_settings(self, var_list, zone_names=None, stats_settings=None, corr_settings=None):
+
+        file_type_src = self.file_type_src
+        file_reader_src = self.file_reader_src
+        file_sampling_src = self.file_sampling_src
+        file_output_src = self.file_output_src
+
+        geo_da_terrain = self.geo_dict[self.grid_terrain_tag]
+        geo_da_cn = self.geo_dict[self.grid_cn_tag]
+        geo_da_cnet = self.geo_dict[self.grid_cnet_tag]
+        point_dframe_registry = self.geo_dict[self.points_registry_tag]
+        geo_da_vmax = self.geo_dict[self.grid_vmax_tag]
+        geo_da_mask_valid = self.geo_dict[self.grid_mask_valid_tag]
+        geo_da_mask_boundary = self.geo_dict[self.grid_mask_boundary_tag]
+        point_operator = self.geo_dict.get(self.points_operator_tag, None)
+
+        # Define the zones of the zonal statistics (optional)
+        geo_zones = None
+        if zone_names:
+            geo_zones = {zone_name: self.geo_dict[self.grid_zones_tag][zone_name] for zone_name in zone_names}
+
+        # Define the no data mask (outside the domain or on the domain boundaries)
+        geo_mask_nodata = np.logical_or(
+            np.logical_not(geo_da_mask_valid.values), geo_da_mask_boundary.values)
+
+        # Check the source reader (the in memory decoding is available only for the binary files)
+        if file_type_src == 'grid_cube':
+            pass
+        elif file_reader_src == 'memory':
+            if file_type_src != 'grid_binary':
+                log_stream.warning(' ===> Source reader "memory" is available only for "grid_binary" type. '
+                                   'The reader is set to "file"')
+                file_reader_src = 'file'
+        elif file_reader_src != 'file':
+            log_stream.error(' ===> Source reader "' + file_reader_src + '" is not supported.')
+            raise NotImplementedError('Only "file" or "memory" readers are available.')
+
+        # Define the values to decode (only the cells used by the registry if sampling is "point")
+        if (file_sampling_src == 'point') and \
+                ((geo_zones is not None) or (stats_settings is not None) or (corr_settings is not None)):
+            log_stream.warning(' ===> Source sampling "point" is not available with the zonal or pixel statistics '
+                               'or with the correlation maps. The sampling is set to "grid"')
+            file_sampling_src = 'grid'
+
+        data_limit_src, data_window_src = None, None
+        if file_sampling_src == 'point':
+            if file_type_src == 'grid_nc':
+                data_window_src = compute_data_window(point_dframe_registry, geo_da_terrain.shape,
+                                                      data_operator=point_operator)
+                log_stream.info(' -----> Read the window [' +
+                                str(data_window_src[0].start) + ':' + str(data_window_src[0].stop) + ', ' +
+                                str(data_window_src[1].start) + ':' + str(data_window_src[1].stop) +
+                                '] of the grid for each time step')
+            elif file_reader_src == 'memory':
+                data_limit_src = compute_data_limit(point_dframe_registry, geo_da_terrain.shape,
+                                                     data_operator=point_operator)
+                log_stream.info(' -----> Decode ' + str(data_limit_src) + ' of ' + str(geo_da_terrain.size) +
+                                ' grid values for each time step')
+            elif file_type_src != 'grid_cube':
+                log_stream.warning(' ===> Source sampling "point" is available only for "memory" reader or '
+                                   '"grid_nc" type. The sampling is set to "grid"')
+        elif file_sampling_src != 'grid':
+            log_stream.error(' ===> Source sampling "' + file_sampling_src + '" is not supported.')
+            raise NotImplementedError('Only "grid" or "point" samplings are available.')
+
+        # Check the source output (the buffers are allocated once for each time chunk)
+        if file_output_src not in ['data_array', 'array']:
+            log_stream.error(' ===> Source output "' + file_output_src + '" is not supported.')
+            raise NotImplementedError('Only "data_array" or "array" outputs are available.')
+
+        # Define the cache of the decoded grids (optional)
+        folder_name_cache = None
+        if self.cache_active_tmp and (file_type_src != 'grid_cube'):
+            folder_name_cache = self.folder_name_cache_tmp
+            make_folder(folder_name_cache)
+            log_stream.info(' -----> Cache of the decoded grids "' + folder_name_cache + '" [size max: ' +
+                            str(self.cache_size_max_tmp) + ' bytes]')
+
+        # Define the static and the settings datasets (shared by the time chunk(s))
+        data_static = {
+            self.grid_terrain_tag: geo_da_terrain, self.grid_cn_tag: geo_da_cn, self.grid_cnet_tag: geo_da_cnet,
+            self.grid_vmax_tag: geo_da_vmax, 'mask_nodata': geo_mask_nodata,
+            self.points_registry_tag: point_dframe_registry, self.points_operator_tag: point_operator,
+            self.grid_zones_tag: geo_zones}
+        data_settings = {
+            'file_type': file_type_src, 'file_reader': file_reader_src, 'file_output': file_output_src,
+            'data_limit': data_limit_src, 'data_window': data_window_src, 'data_prefetch': self.process_prefetch,
+            'variables': var_list, 'stats': stats_settings, 'correlation': corr_settings,
+            'spatial_operation': self.alg_point_geo_spatial_operation,
+            'spatial_mask': self.alg_point_geo_spatial_mask,
+            'cache_folder': folder_name_cache, 'cache_size_max': self.cache_size_max_tmp,
+            'file_check': self.file_path_inventory is None}
+
+        return data_static, data_settings
+
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # Method to repack the source datasets in the grid cube file
+    def repack_data(self, var_name='SM', var_min=0.0, var_max=1.0, var_scale_factor=100.0):
+
+        log_stream.info(' ----> Repack soil moisture grid ... ')
+
+        time_range = self.time_range
+        file_path_src = self.file_path_src
+        repack_dict = self.repack_dict
+
+        if isinstance(file_path_src, str):
+            file_path_src = [file_path_src]
+
+        if repack_dict is None:
+            log_stream.error(' ===> Repack settings are not defined')
+            raise IOError('Repack settings must be defined to create the grid cube')
+        if self.file_type_src == 'grid_cube':
+            log_stream.error(' ===> Source data type "grid_cube" can not be repacked')
+            raise NotImplementedError('Only "grid_binary" or "grid_nc" types can be repacked.')
+
+        file_path_cube = fill_tags2string(
+            os.path.join(repack_dict[self.folder_name_tag], repack_dict[self.file_name_tag]),
+            self.template_tags_dict, {'catchment_name': self.alg_catchment_name})[0]
+
+        # Search the available source files
+        if self.file_path_inventory is not None:
+            time_range, file_path_src = self.search_data_files(time_range, file_path_src)
+
+        # Define the static and the settings datasets (all the cells are decoded in the grid cube)
+        self.file_sampling_src, self.file_output_src = 'grid', 'array'
+        var_list = self.define_data_variables(
+            var_name=var_name, var_min=var_min, var_max=var_max, var_scale_factor=var_scale_factor)
+        if var_list.__len__() > 1:
+            log_stream.warning(' ===> Grid cube is defined by one variable only. '
+                               'Only the variable "' + var_list[0]['var_name'] + '" is repacked')
+        data_static, data_settings = self.define_data_settings(var_list[:1])
+
+        repack_data_cube(
+            time_range, file_path_src, file_path_cube, data_static, data_settings,
+            time_frequency=self.time_dict['time_frequency'], var_name=var_name,
+            chunk_time=repack_dict.get('chunk_time', 168), chunk_space=repack_dict.get('chunk_space', 32),
+            compression_level=repack_dict.get('compression_level', 4))
+
+        log_stream.info(' ----> Repack soil moisture grid ... DONE')
+
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # Method to save the pixel statistics (accumulator for the next runs and maps on the terrain grid)
+    def save_data_stats(self, stats_collection, file_path_stats_anc, file_path_stats_dst):
+
+        log_stream.info(' -----> Save statistics ... ')
+
+        if stats_collection is None:
+            log_stream.info(' -----> Save statistics ... SKIPPED. Datasets are not available')
+            return
+
+        geo_da_terrain = self.geo_dict[self.grid_terrain_tag]
+
+        folder_name_stats_anc, file_name_stats_anc = os.path.split(file_path_stats_anc)
+        make_folder(folder_name_stats_anc)
+        write_obj(file_path_stats_anc, stats_collection)
+
+        stats_time = pd.DatetimeIndex(stats_collection['time'])
+        stats_maps = compute_data_stats_maps(stats_collection)
+
+        folder_name_stats_dst, file_name_stats_dst = os.path.split(file_path_stats_dst)
+        make_folder(folder_name_stats_dst)
+        if os.path.exists(file_path_stats_dst):
+            os.remove(file_path_stats_dst)
+        write_file_stats(
+            file_path_stats_dst, stats_maps,
+            geo_da_terrain[self.geo_x_tag].values, geo_da_terrain[self.geo_y_tag].values,
+            stats_groups=stats_collection['groups'],
+            stats_attrs={'time_start': str(stats_time.min()) if stats_time.__len__() > 0 else '',
+                         'time_end': str(stats_time.max()) if stats_time.__len__() > 0 else '',
+                         'time_steps': stats_time.__len__(), 'variance': 'population variance'})
+
+        log_stream.info(' -----> Save statistics ... DONE [time steps: ' + str(stats_time.__len__()) + ']')
+
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # Method to save the correlation maps (accumulator for the next runs and maps on the terrain grid)
+    def save_data_corr(self, corr_collection, file_path_corr_anc, file_path_corr_dst):
+
+        log_stream.info(' -----> Save correlation ... ')
+
+        if corr_collection is None:
+            log_stream.info(' -----> Save correlation ... SKIPPED. Datasets are not available')
+            return
+
+        geo_da_terrain = self.geo_dict[self.grid_terrain_tag]
+
+        corr_maps = compute_data_corr_maps(corr_collection, geo_da_terrain.shape, count_min=self.corr_count_min)
+
+        folder_name_corr_anc, file_name_corr_anc = os.path.split(file_path_corr_anc)
+        make_folder(folder_name_corr_anc)
+        write_obj(file_path_corr_anc, corr_collection)
+
+        corr_time = pd.DatetimeIndex(corr_collection['time'])
+
+        folder_name_corr_dst, file_name_corr_dst = os.path.split(file_path_corr_dst)
+        make_folder(folder_name_corr_dst)
+        if os.path.exists(file_path_corr_dst):
+            os.remove(file_path_corr_dst)
+        write_file_stats(
+            file_path_corr_dst, corr_maps,
+            geo_da_terrain[self.geo_x_tag].values, geo_da_terrain[self.geo_y_tag].values,
+            stats_groups=corr_collection['points'], dim_name_group='point',
+            stats_attrs={'time_start': str(corr_time.min()) if corr_time.__len__() > 0 else '',
+                         'time_end': str(corr_time.max()) if corr_time.__len__() > 0 else '',
+                         'time_steps': corr_time.__len__(), 'count_min': self.corr_count_min,
+                         'temporal_window': self.alg_point_geo_temporal_window,
+                         'correlation': 'pearson coefficient of the pairs of valid values'})
+
+        log_stream.info(' -----> Save correlation ... DONE [time steps: ' + str(corr_time.__len__()) + ', points: ' +
+                        str(corr_collection['points'].__len__()) + ']')
+
+    # -------------------------------------------------------------------------------------
+
     # -------------------------------------------------------------------------------------
     # Method to organize data
     def organize_data(self, var_name='soil_moisture', var_min=0.0, var_max=1.0, var_scale_factor=100.0):
@@ -194,21 +870,41 @@ class DriverData:
         file_type_src = self.file_type_src
 
         file_path_src = self.file_path_src
-        file_path_anc_raw = self.file_path_anc
 
-        geo_da_terrain = self.geo_dict[self.grid_terrain_tag]
-        geo_da_cn = self.geo_dict[self.grid_cn_tag]
-        geo_da_cnet = self.geo_dict[self.grid_cnet_tag]
+        if isinstance(file_path_src, str):
+            file_path_src = [file_path_src]
+
         point_dframe_registry = self.geo_dict[self.points_registry_tag]
+        point_operator = self.geo_dict.get(self.points_operator_tag, None)
 
         flag_data_updating = self.flag_data_updating
+        flag_data_incremental = self.flag_data_incremental
+
+        # Define the source variable(s) and the related ancillary file(s)
+        var_list = self.define_data_variables(var_min=var_min, var_max=var_max, var_scale_factor=var_scale_factor)
+        file_path_anc_dict = self.define_data_anc(var_list)
+        # Define the zone(s) and the related ancillary file(s)
+        file_path_zones_dict = self.define_data_zones()
+        # Define the pixel statistics and the related file(s)
+        file_path_stats_anc, file_path_stats_dst = self.define_data_stats()
+        flag_stats = file_path_stats_anc is not None
+        # Define the correlation maps and the related file(s)
+        file_path_corr_anc, file_path_corr_dst = self.define_data_corr()
+        flag_corr = file_path_corr_anc is not None
+
+        file_path_anc_list = list(file_path_zones_dict.values())
+        if flag_stats:
+            file_path_anc_list.extend([file_path_stats_anc, file_path_stats_dst])
+        if flag_corr:
+            file_path_anc_list.extend([file_path_corr_anc, file_path_corr_dst])
+        for var_key, file_path_anc_raw in file_path_anc_dict.items():
+            for point_id, point_row in point_dframe_registry.iterrows():
+                point_name, point_code = point_row['point_name'], point_row['point_code']
+                file_path_anc_list.append(
+                    self.define_data_anc_point(file_path_anc_raw, var_key, point_name, point_code))
 
         flag_data_computing = False
-        for point_id, point_row in point_dframe_registry.iterrows():
-            point_name, point_code = point_row['point_name'], point_row['point_code']
-            template_values_dict = {'point_code': point_code, 'point_name': point_name}
-            file_path_anc_tmp = fill_tags2string(file_path_anc_raw,
-                                                 self.template_tags_dict, template_values_dict)[0]
+        for file_path_anc_tmp in file_path_anc_list:
             if flag_data_updating:
                 flag_data_computing = True
                 if os.path.exists(file_path_anc_tmp):
@@ -218,86 +914,229 @@ class DriverData:
                     flag_data_computing = True
                     break
 
-        if flag_data_computing:
+        # Get the accumulator of the pixel statistics (time steps of the previous runs)
+        stats_archive = None
+        if flag_stats:
+            stats_archive = self.read_data_stats(file_path_stats_anc)
+        # Get the accumulator of the correlation maps (time steps of the previous runs)
+        corr_archive, corr_cells = None, None
+        if flag_corr:
+            corr_cells = self.define_data_corr_cells()
+            corr_archive = self.read_data_corr(
+                file_path_corr_anc, list(point_dframe_registry['point_name'].values), corr_cells)
+
+        # Search the time steps to compute (all the time steps or only the missing ones)
+        point_archive, zone_archive = {}, {}
+        if flag_data_incremental and (not flag_data_updating):
+            time_range_computing, point_archive, zone_archive = self.search_data_time(
+                time_range, point_dframe_registry, file_path_anc_dict, file_path_zones_dict,
+                stats_archive=stats_archive, flag_stats=flag_stats, corr_archive=corr_archive, flag_corr=flag_corr)
+            flag_data_computing = time_range_computing.__len__() > 0
+
+            log_stream.info(' -----> Incremental mode: ' + str(time_range_computing.__len__()) + ' of ' +
+                            str(time_range.__len__()) + ' time steps to compute')
+
+            file_idx_computing = time_range.get_indexer(time_range_computing)
+            file_path_src = [file_path_src[file_idx] for file_idx in file_idx_computing]
+            time_range = time_range_computing
+
+        # Search the available source files (only the time steps with a source file are computed)
+        if flag_data_computing and (self.file_path_inventory is not None) and (file_type_src != 'grid_cube'):
+            time_range, file_path_src = self.search_data_files(time_range, file_path_src)
+            flag_data_computing = time_range.__len__() > 0
 
-            sm_point_collections = None
-            log_stream.info(' -----> Get datasets ... ')
-            for time_step, file_src_step in zip(time_range, file_path_src):
+        if flag_data_computing:
 
-                log_stream.info(' ------> Time "' + str(time_step) + '" ... ')
+            # Define the static and the settings datasets
+            stats_settings = None
+            if flag_stats:
+                stats_settings = {'lut': self.lut_data_season,
+                                  'time_exclude': set(stats_archive['time']) if stats_archive is not None else set()}
+            corr_settings = None
+            if flag_corr:
+                corr_points, corr_values = self.get_data_corr_points(time_range, point_dframe_registry)
+                corr_settings = {'points': corr_points, 'index': corr_cells, 'time': time_range, 'values': corr_values,
+                                 'time_exclude': set(corr_archive['time']) if corr_archive is not None else set()}
+            data_static, data_settings = self.define_data_settings(
+                var_list, zone_names=list(file_path_zones_dict.keys()), stats_settings=stats_settings,
+                corr_settings=corr_settings)
+
+            if file_type_src == 'grid_cube':
+
+                # Get the point collections from the grid cube (a few time chunk reads)
+                log_stream.info(' -----> Get datasets [grid cube] ... ')
+                sm_point_collections = {
+                    var_list[0]['var_name']: compute_data_cube(
+                        time_range, file_path_src[0], data_static, data_settings)}
+                sm_zone_collections, sm_stats_collection, sm_corr_collection = {}, None, None
 
-                if os.path.exists(file_src_step):
+            else:
 
-                    if file_src_step.endswith(self.file_extension_zip):
-                        file_tmp_step = change_extension(file_src_step, self.file_extension_unzip)
-                        unzip_filename(file_src_step, file_tmp_step)
-                    else:
-                        file_tmp_step = file_src_step
+                # Define the point collections (preallocated over the time range; one for each variable)
+                if point_operator is not None:
+                    point_names = point_operator['points']
+                else:
+                    point_names = list(point_dframe_registry['point_name'].values)
+                sm_point_collections = {var_obj['var_name']: create_data_collection(time_range, point_names)
+                                        for var_obj in var_list}
+                sm_zone_collections = {}
+                if data_static[self.grid_zones_tag] is not None:
+                    sm_zone_collections = {
+                        zone_name: create_data_collection(time_range, define_data_zones_columns(zone_obj))
+                        for zone_name, zone_obj in data_static[self.grid_zones_tag].items()}
+                sm_stats_collection, sm_corr_collection = None, None
+
+                # Define the time chunk(s)
+                chunk_list = split_process_chunks(time_range, file_path_src, process_chunk=self.process_chunk)
+
+                # Get the time chunk(s) completed by a previous run (checkpoint)
+                checkpoint_key = define_cache_tag(
+                    time_range.values, point_names, file_type_src, var_list, list(sm_zone_collections.keys()),
+                    stats_settings, self.process_chunk,
+                    [corr_settings['points'], sorted(corr_settings['time_exclude']), corr_settings['values']]
+                    if corr_settings is not None else None)
+                chunk_completed, checkpoint_time = [], time.time()
+                if self.file_path_checkpoint is not None:
+                    sm_collections, chunk_completed = self.read_data_checkpoint(
+                        checkpoint_key, {'points': sm_point_collections, 'zones': sm_zone_collections,
+                                         'stats': sm_stats_collection, 'correlation': sm_corr_collection},
+                        chunk_list.__len__())
+                    sm_point_collections, sm_zone_collections = sm_collections['points'], sm_collections['zones']
+                    sm_stats_collection, sm_corr_collection = sm_collections['stats'], sm_collections['correlation']
+                chunk_id_list = [chunk_id for chunk_id in range(chunk_list.__len__())
+                                 if chunk_id not in chunk_completed]
+                chunk_list = [chunk_list[chunk_id] for chunk_id in chunk_id_list]
+
+                log_stream.info(' -----> Get datasets [process mode: ' + self.process_mode + ', chunks: ' +
+                                str(chunk_list.__len__()) + ', variables: ' + str(var_list.__len__()) + '] ... ')
+                if self.process_mode == 'pool':
+                    chunk_iterator = run_process_pool(
+                        compute_data_chunk_by_process, chunk_list, process_workers=self.process_workers,
+                        process_data_shared={'data_static': data_static, 'data_settings': data_settings})
+                else:
+                    chunk_iterator = (compute_data_chunk(time_chunk, file_chunk, data_static, data_settings)
+                                      for time_chunk, file_chunk in chunk_list)
+
+                # Join the time chunk(s) to the point and zone collections (in the order of the time range) and merge
+                # the pixel statistics and the correlation accumulators (the log records of the pool worker(s) are
+                # emitted in the order of the chunks)
+                for chunk_id, sm_chunks in zip(chunk_id_list, chunk_iterator):
+                    if self.process_mode == 'pool':
+                        sm_chunks, chunk_records, chunk_error = sm_chunks
+                        emit_process_logs(chunk_records, chunk_error)
+                    for var_key, sm_point_chunk in sm_chunks['points'].items():
+                        sm_point_collections[var_key] = join_data_collection(
+                            sm_point_collections[var_key], sm_point_chunk)
+                    for zone_key, sm_zone_chunk in sm_chunks['zones'].items():
+                        sm_zone_collections[zone_key] = join_data_collection(
+                            sm_zone_collections[zone_key], sm_zone_chunk)
+                    sm_stats_collection = merge_data_stats(sm_stats_collection, sm_chunks['stats'])
+                    sm_corr_collection = merge_data_corr(sm_corr_collection, sm_chunks['correlation'])
+
+                    # Save the checkpoint (collections and completed time chunk(s); at most once for each time
+                    # interval, the last chunk is saved with the datasets)
+                    if self.file_path_checkpoint is not None:
+                        chunk_completed.append(chunk_id)
+                        if (chunk_id != chunk_id_list[-1]) and \
+                                (time.time() - checkpoint_time >= self.checkpoint_interval):
+                            self.write_data_checkpoint(
+                                checkpoint_key, {'points': sm_point_collections, 'zones': sm_zone_collections,
+                                                 'stats': sm_stats_collection, 'correlation': sm_corr_collection},
+                                chunk_completed)
+                            checkpoint_time = time.time()
 
-                    if file_type_src == 'grid_binary':
+            log_stream.info(' -----> Get datasets ... DONE')
 
-                        sm_da_base = get_data_binary(
-                            file_tmp_step, da_geo=geo_da_terrain,
-                            da_cn=geo_da_cn, da_cnet=geo_da_cnet, mask_cnet=False,
-                            value_sm_min=var_min, value_sm_max=var_max, var_sm_scale_factor=var_scale_factor)
+            # Iterate over variable(s)
+            for var_key, file_path_anc_raw in file_path_anc_dict.items():
 
-                    elif file_type_src == 'grid_nc':
+                log_stream.info(' -----> Save datasets [variable: ' + var_key + '] ... ')
 
-                        sm_da_base = get_data_nc(
-                            file_tmp_step, da_geo=geo_da_terrain,
-                            da_cn=geo_da_cn, da_cnet=geo_da_cnet, mask_cnet=False,
-                            value_sm_min=var_min, value_sm_max=var_max, var_sm_scale_factor=var_scale_factor)
+                # Convert point collections to dataframe
+                sm_point_dframe = None
+                if var_key in sm_point_collections:
+                    sm_point_dframe = convert_data_collection(sm_point_collections[var_key])
 
-                    else:
-                        log_stream.error(' ===> Source data type "' + file_type_src + '" is not supported.')
-                        raise NotImplementedError('Only "grid_binary" or "grid_nc" types are available.')
+                # Iterate over point(s)
+                for point_id, point_row in point_dframe_registry.iterrows():
+                    point_name, point_code = point_row['point_name'], point_row['point_code']
 
-                    # Get data points
-                    sm_point_data = extract_data_grid2point(
-                        sm_da_base, point_dframe_registry,
-                        method_spatial_operation=self.alg_point_geo_spatial_operation,
-                        method_spatial_mask=self.alg_point_geo_spatial_mask)
-                    # Join data points
-                    sm_point_collections = join_data_point(time_step, sm_point_data, sm_point_collections)
+                    log_stream.info(' ------> Point "' + point_name + '" ... ')
 
-                    log_stream.info(' ------> Time "' + str(time_step) + '" ... DONE')
+                    file_path_anc_def = self.define_data_anc_point(file_path_anc_raw, var_key, point_name, point_code)
 
-                else:
-                    log_stream.info(' ------> Time "' + str(time_step) + '" ... FAILED')
-                    log_stream.warning(' ===> File: "' + file_src_step + '" does not exist')
+                    if (sm_point_dframe is not None) and (point_name in list(sm_point_dframe.columns)):
+                        sm_point_series = sm_point_dframe[point_name]
+                    else:
+                        sm_point_series = None
+
+                    # Append the new time steps to the previous point series (incremental mode)
+                    sm_point_archive = point_archive.get(var_key, {}).get(point_name, None)
+                    if sm_point_archive is not None:
+                        if sm_point_series is not None:
+                            sm_point_series = sm_point_series[~sm_point_series.index.isin(sm_point_archive.index)]
+                            sm_point_series = pd.concat([sm_point_archive, sm_point_series]).sort_index()
+                            sm_point_series.name = point_name
+                        else:
+                            sm_point_series = sm_point_archive
+
+                    # Save point collections
+                    if sm_point_series is not None:
+                        folder_name_anc, file_name_anc = os.path.split(file_path_anc_def)
+                        make_folder(folder_name_anc)
+
+                        write_obj(file_path_anc_def, sm_point_series)
+
+                        log_stream.info(' ------> Point "' + point_name + '" ... DONE')
+                    else:
+                        log_stream.info(' ------> Point "' + point_name + '" ... FAILED')
+                        log_stream.error(' ===> Datasets are defined by NoneType')
+                        raise IOError('Datasets must be defined to correctly run the algorithm')
 
-            log_stream.info(' -----> Get datasets ... DONE')
+                log_stream.info(' -----> Save datasets [variable: ' + var_key + '] ... DONE')
 
-            # Iterate over point(s)
-            log_stream.info(' -----> Save datasets ... ')
-            for point_id, point_row in point_dframe_registry.iterrows():
-                point_name, point_code = point_row['point_name'], point_row['point_code']
+            # Iterate over zone(s)
+            for zone_key, file_path_zone_def in file_path_zones_dict.items():
 
-                log_stream.info(' ------> Point "' + point_name + '" ... ')
+                log_stream.info(' -----> Save datasets [zone: ' + zone_key + '] ... ')
 
-                template_values_dict = {'point_code': point_code, 'point_name': point_name}
-                file_path_anc_def = fill_tags2string(file_path_anc_raw,
-                                                     self.template_tags_dict, template_values_dict)[0]
+                sm_zone_dframe = None
+                if zone_key in sm_zone_collections:
+                    sm_zone_dframe = convert_data_collection(sm_zone_collections[zone_key])
 
-                if point_name in list(sm_point_collections.columns):
-                    sm_point_series = sm_point_collections[point_name]
-                else:
-                    sm_point_series = None
+                # Append the new time steps to the previous zone series (incremental mode)
+                sm_zone_archive = zone_archive.get(zone_key, None)
+                if sm_zone_archive is not None:
+                    if sm_zone_dframe is not None:
+                        sm_zone_dframe = sm_zone_dframe[~sm_zone_dframe.index.isin(sm_zone_archive.index)]
+                        sm_zone_dframe = pd.concat([sm_zone_archive, sm_zone_dframe]).sort_index()
+                    else:
+                        sm_zone_dframe = sm_zone_archive
 
-                # Save point collections
-                if sm_point_series is not None:
-                    folder_name_anc, file_name_anc = os.path.split(file_path_anc_def)
-                    make_folder(folder_name_anc)
+                if sm_zone_dframe is not None:
+                    folder_name_zone, file_name_zone = os.path.split(file_path_zone_def)
+                    make_folder(folder_name_zone)
 
-                    write_obj(file_path_anc_def, sm_point_series)
+                    write_obj(file_path_zone_def, sm_zone_dframe)
 
-                    log_stream.info(' ------> Point "' + point_name + '" ... DONE')
+                    log_stream.info(' -----> Save datasets [zone: ' + zone_key + '] ... DONE')
                 else:
-                    log_stream.info(' ------> Point "' + point_name + '" ... FAILED')
-                    log_stream.error(' ===> Datasets are defined by NoneType')
-                    raise IOError('Datasets must be defined to correctly run the algorithm')
+                    log_stream.info(' -----> Save datasets [zone: ' + zone_key + '] ... SKIPPED. '
+                                    'Datasets are not available')
+
+            # Save the pixel statistics (accumulator and maps)
+            if flag_stats:
+                self.save_data_stats(merge_data_stats(stats_archive, sm_stats_collection),
+                                     file_path_stats_anc, file_path_stats_dst)
+            # Save the correlation maps (accumulator and maps)
+            if flag_corr:
+                self.save_data_corr(merge_data_corr(corr_archive, sm_corr_collection),
+                                    file_path_corr_anc, file_path_corr_dst)
+
+            # Remove the checkpoint (all the datasets are saved)
+            if (self.file_path_checkpoint is not None) and os.path.exists(self.file_path_checkpoint):
+                os.remove(self.file_path_checkpoint)
 
-            log_stream.info(' -----> Save datasets ... DONE')
             log_stream.info(' ----> Organize soil moisture grid ... DONE')
         else:
 
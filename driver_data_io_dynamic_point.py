@@ -11,18 +11,16 @@ Version:       '1.5.0'
 # Library
 import logging
 import os
-import re
-import glob
 import pandas as pd
 
 from copy import deepcopy
 
-from lib_data_io_pickle import write_obj
-
-from lib_utils_data_point import get_data_mat, concatenate_data_series
-from lib_utils_system import unzip_filename
+from lib_utils_data_point import search_data_files, search_data_period, check_data_window, \
+    compute_data_point, compute_data_point_by_process
+from lib_utils_process import define_process_settings, run_process_pool, emit_process_logs
+from lib_utils_cache import evict_cache_folder
 from lib_utils_time import define_time_range
-from lib_utils_system import fill_tags2string, make_folder, change_extension
+from lib_utils_system import fill_tags2string, make_folder
 
 from lib_info_args import logger_name, zip_extension
 
@@ -44,7 +42,7 @@ class DriverData:
                  geo_dict=None, time_dict=None, tmp_dict=None,
                  template_tags_dict=None,
                  flag_data_src='point',
-                 flag_data_updating=True):
+                 flag_data_updating=True, flag_data_incremental=False):
 
         self.time_step = pd.Timestamp(time_step)
         self.time_reference = pd.Timestamp(time_reference)
@@ -58,9 +56,11 @@ class DriverData:
         self.flag_data_src = flag_data_src
 
         self.file_name_tag = 'file_name'
+        self.file_name_manifest_tag = 'file_name_manifest'
         self.folder_name_tag = 'folder_name'
         self.file_type_tag = 'obj_type'
         self.file_compression_tag = 'obj_compression'
+        self.file_duplicates_tag = 'obj_duplicates'
 
         self.grid_terrain_tag = 'terrain'
         self.grid_cn_tag = 'cn'
@@ -77,6 +77,8 @@ class DriverData:
         self.alg_point_geo_method_search = alg_dict['geo_method_search']
         self.alg_point_geo_radius_influence = alg_dict['geo_radius_influence']
         self.alg_point_geo_neighbours = alg_dict['geo_neighbours']
+        self.alg_point_geo_temporal_window = alg_dict.get('geo_temporal_window', None)
+        self.process_mode, self.process_workers, _, _ = define_process_settings(alg_dict)
 
         # time object(s)
         self.time_dict = time_dict[self.flag_data_src]
@@ -86,6 +88,11 @@ class DriverData:
         self.file_type_src = src_dict[self.flag_data_src][self.file_type_tag]
         self.folder_name_src_raw = self.src_dict[self.flag_data_src][self.folder_name_tag]
         self.file_name_src_raw = self.src_dict[self.flag_data_src][self.file_name_tag]
+        self.file_duplicates_src = src_dict[self.flag_data_src].get(self.file_duplicates_tag, 'last')
+
+        if self.file_duplicates_src not in ['last', 'first', 'mean']:
+            log_stream.error(' ===> Source duplicate policy "' + self.file_duplicates_src + '" is not supported.')
+            raise NotImplementedError('Only "last", "first" or "mean" policies are available.')
 
         self.file_path_src = self.collect_file_list(
             self.folder_name_src_raw, self.file_name_src_raw, file_time_range=self.time_range)
@@ -97,14 +104,23 @@ class DriverData:
         self.file_path_anc = self.collect_file_list(
             self.folder_name_anc_raw, self.file_name_anc_raw, file_time_range=pd.DatetimeIndex([self.time_reference]))
 
+        # manifest of the ingested source files (incremental mode; file name defined for each point)
+        self.file_name_manifest_raw = anc_dict[self.flag_data_src].get(
+            self.file_name_manifest_tag, os.path.splitext(self.file_name_anc_raw)[0] + '.manifest')
+        self.file_path_manifest = os.path.join(self.folder_name_anc_raw, self.file_name_manifest_raw)
+
         # tmp object(s)
         self.folder_name_tmp_raw = tmp_dict[self.folder_name_tag]
         self.file_name_tmp_raw = tmp_dict[self.file_name_tag]
+        self.cache_active_tmp = tmp_dict.get('cache_active', False)
+        self.cache_size_max_tmp = tmp_dict.get('cache_size_max', None)
+        self.folder_name_cache_tmp = os.path.join(self.folder_name_tmp_raw, 'cache', 'point')
 
         self.file_extension_zip = zip_extension
         self.file_extension_unzip = 'bin'
 
         self.flag_data_updating = flag_data_updating
+        self.flag_data_incremental = flag_data_incremental
 
     # -------------------------------------------------------------------------------------
 
@@ -186,17 +202,7 @@ class DriverData:
     # Method to search
     @staticmethod
     def search_file_list(file_path_undefined):
-
-        if '*' in file_path_undefined:
-            file_path_list = glob.glob(file_path_undefined)
-            file_path_list = sorted(file_path_list)
-        else:
-            file_path_list = deepcopy(file_path_undefined)
-
-        if isinstance(file_path_list, str):
-            file_path_list = [file_path_list]
-
-        return file_path_list
+        return search_data_files(file_path_undefined)
 
     # -------------------------------------------------------------------------------------
 
@@ -204,20 +210,7 @@ class DriverData:
     # Method to search file time period
     @staticmethod
     def search_file_time(file_path_list):
-
-        file_time_start, file_time_end = [], []
-        for file_id, file_path_step in enumerate(file_path_list):
-
-            file_time_tmp = re.search(r'\d{12}_\d{12}', file_path_step)
-            file_time_str_start, file_time_str_end = file_time_tmp.group().split('_')
-
-            file_time_str_start = str(pd.Timestamp(file_time_str_start))
-            file_time_str_end = str(pd.Timestamp(file_time_str_end))
-
-            file_time_start.append(file_time_str_start)
-            file_time_end.append(file_time_str_end)
-
-        return file_time_start, file_time_end
+        return search_data_period(file_path_list)
     # -------------------------------------------------------------------------------------
 
     # -------------------------------------------------------------------------------------
@@ -231,6 +224,7 @@ class DriverData:
 
         file_path_src_raw = self.file_path_src
         file_path_anc_raw = self.file_path_anc
+        file_path_manifest_raw = self.file_path_manifest
 
         geo_da_terrain = self.geo_dict[self.grid_terrain_tag]
         geo_da_cn = self.geo_dict[self.grid_cn_tag]
@@ -238,7 +232,30 @@ class DriverData:
         point_dframe_registry = self.geo_dict[self.points_registry_tag]
 
         flag_data_updating = self.flag_data_updating
-
+        flag_data_incremental = self.flag_data_incremental
+
+        # Define the time window of the point series (extended by the temporal window used to synchronize the series)
+        time_window_pad = pd.Timedelta(self.alg_point_geo_temporal_window) \
+            if self.alg_point_geo_temporal_window is not None else pd.Timedelta(0)
+        time_window = (pd.Timestamp(self.time_start) - time_window_pad, pd.Timestamp(self.time_end) + time_window_pad)
+
+        # Define the cache of the parsed source files (optional)
+        folder_name_cache = None
+        if self.cache_active_tmp:
+            folder_name_cache = self.folder_name_cache_tmp
+            make_folder(folder_name_cache)
+            log_stream.info(' -----> Cache of the parsed point files "' + folder_name_cache + '" [size max: ' +
+                            str(self.cache_size_max_tmp) + ' bytes]')
+
+        data_settings = {
+            'file_type': file_type_src, 'var_min': var_min, 'var_max': var_max, 'var_scale_factor': var_scale_factor,
+            'file_extension_zip': self.file_extension_zip, 'file_extension_unzip': self.file_extension_unzip,
+            'cache_folder': folder_name_cache, 'cache_size_max': self.cache_size_max_tmp, 'time_window': time_window,
+            'duplicate_policy': self.file_duplicates_src}
+
+        # Define the point(s) to compute (the points previously computed are skipped or, in incremental mode,
+        # updated with the new or modified files of the manifest)
+        point_args = []
         for point_id, point_row in point_dframe_registry.iterrows():
 
             point_name, point_code = point_row['point_name'], point_row['point_code']
@@ -246,79 +263,46 @@ class DriverData:
             template_values_dict = {'point_code': point_code, 'point_name': point_name}
             file_path_src_def = fill_tags2string(file_path_src_raw, self.template_tags_dict, template_values_dict)[0]
             file_path_anc_def = fill_tags2string(file_path_anc_raw, self.template_tags_dict, template_values_dict)[0]
+            file_path_manifest_def = None
+            if flag_data_incremental:
+                file_path_manifest_def = fill_tags2string(
+                    file_path_manifest_raw, self.template_tags_dict,
+                    {'catchment_name': self.alg_catchment_name, 'point_code': point_code, 'point_name': point_name,
+                     'ancillary_sub_path_time_point': self.time_reference,
+                     'ancillary_datetime_point': self.time_reference})[0]
 
             if flag_data_updating:
-                if os.path.exists(file_path_anc_def):
-                    os.remove(file_path_anc_def)
-
-            log_stream.info(' -----> Point "' + point_name + '" ... ')
-
-            if not os.path.exists(file_path_anc_def):
-
-                file_path_list_src = self.search_file_list(file_path_src_def)
-                file_time_start_src, file_time_end_src = self.search_file_time(file_path_list_src)
-
-                log_stream.info(' ------> Get datasets ... ')
-
-                sm_point_series = None
-                for time_start_step, time_end_step, file_src_step in zip(
-                        file_time_start_src, file_time_end_src, file_path_list_src):
-
-                    log_stream.info(' --------> Time "' + str(time_start_step) + '" - "'
-                                    + str(time_end_step) + '"... ')
-
-                    if os.path.exists(file_src_step):
-
-                        if file_src_step.endswith(self.file_extension_zip):
-                            file_tmp_step = change_extension(file_src_step, self.file_extension_unzip)
-                            unzip_filename(file_src_step, file_tmp_step)
-                        else:
-                            file_tmp_step = file_src_step
-
-                        if file_type_src == 'point_mat':
-
-                            sm_point_base = get_data_mat(
-                                file_tmp_step, var_name=point_name,
-                                var_value_min=var_min, var_value_max=var_max, var_scale_factor=var_scale_factor)
-
-                        else:
-                            log_stream.error(' ===> Source data type "' + file_type_src + '" is not supported.')
-                            raise NotImplementedError('Only "point_mat" type is available.')
-
-                        # Concatenate series of different period
-                        sm_point_series = concatenate_data_series(sm_point_base, sm_point_series)
-
-                        log_stream.info(' --------> Time "' + str(time_start_step) + '" - "'
-                                        + str(time_end_step) + '"... DONE')
-
-                    else:
-                        log_stream.info(' --------> Time "' + str(time_start_step) + '" - "'
-                                        + str(time_end_step) + '"... FAILED')
-                        log_stream.warning(' ===> File: "' + file_src_step + '" does not exist')
-
-                log_stream.info(' ------> Get datasets ... DONE')
-
-                # Save point time series
-                log_stream.info(' ------> Save datasets ... ')
-                if sm_point_series is not None:
-                    folder_name_anc, file_name_anc = os.path.split(file_path_anc_def)
-                    make_folder(folder_name_anc)
-
-                    write_obj(file_path_anc_def, sm_point_series)
-
-                    log_stream.info(' ------> Save datasets ... DONE')
-
-                else:
-                    log_stream.info(' ------> Save datasets ... FAILED')
-                    log_stream.error(' ===> Datasets are defined by NoneType')
-                    raise IOError('Datasets must be defined to correctly run the algorithm')
-
-                log_stream.info(' -----> Point "' + point_name + '" ... DONE')
-
+                for file_path_tmp in [file_path_anc_def, file_path_manifest_def]:
+                    if (file_path_tmp is not None) and os.path.exists(file_path_tmp):
+                        os.remove(file_path_tmp)
+
+            if flag_data_incremental or (not os.path.exists(file_path_anc_def)):
+                point_args.append((point_name, file_path_src_def, file_path_anc_def, file_path_manifest_def))
+            elif not check_data_window(file_path_anc_def, time_window):
+                log_stream.info(' -----> Point "' + point_name + '" ... Dataframe previously computed over a '
+                                'different time window')
+                point_args.append((point_name, file_path_src_def, file_path_anc_def, file_path_manifest_def))
             else:
-
                 log_stream.info(' -----> Point "' + point_name + '" ... SKIPPED. Dataframe previously computed')
 
+        # Compute the point(s) (the series are saved by the worker(s); the log records are emitted for each point)
+        if (self.process_mode == 'pool') and (point_args.__len__() > 1):
+            log_stream.info(' -----> Get datasets [process mode: pool, points: ' + str(point_args.__len__()) + '] ... ')
+            for point_name, point_records, point_error in run_process_pool(
+                    compute_data_point_by_process, point_args, process_workers=self.process_workers,
+                    process_data_shared={'data_settings': data_settings}):
+                emit_process_logs(point_records, point_error)
+            log_stream.info(' -----> Get datasets [process mode: pool, points: ' + str(point_args.__len__()) + '] '
+                            '... DONE')
+        else:
+            for point_name, file_path_src_def, file_path_anc_def, file_path_manifest_def in point_args:
+                compute_data_point(point_name, file_path_src_def, file_path_anc_def, data_settings,
+                                   file_path_manifest=file_path_manifest_def)
+
+        # Evict the cache files (least recently used files over the byte budget; once all the points are computed)
+        if folder_name_cache is not None:
+            evict_cache_folder(folder_name_cache, self.cache_size_max_tmp)
+
         log_stream.info(' ----> Organize soil moisture point ... DONE')
     # -------------------------------------------------------------------------------------
 
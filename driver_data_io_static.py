@@ -19,7 +19,9 @@ import pandas as pd
 from lib_data_io_ascii import read_file_raster, read_file_point
 from lib_data_io_pickle import read_obj, write_obj
 
-from lib_utils_geo import get_grid_value_from_xy, get_grid_idx_from_xy, get_idx_by_win
+from lib_utils_geo import get_grid_value_from_xy, get_grid_idx_from_xy, get_grid_idx_by_radius, get_idx_by_win, \
+    convert_cn2s
+from lib_utils_data_grid import compute_data_operator, compute_data_zones
 from lib_utils_system import fill_tags2string, make_folder
 
 from lib_info_args import logger_name
@@ -61,6 +63,11 @@ class DriverData:
         self.grid_cn_tag = 'cn'
         self.grid_cnet_tag = 'channels_network'
         self.points_registry_tag = 'stations_registry'
+        self.grid_vmax_tag = 'vmax'
+        self.grid_mask_valid_tag = 'mask_valid'
+        self.grid_mask_boundary_tag = 'mask_boundary'
+        self.points_operator_tag = 'stations_operator'
+        self.grid_zones_tag = 'zones'
 
         self.geo_x_tag = 'Longitude'
         self.geo_y_tag = 'Latitude'
@@ -70,6 +77,10 @@ class DriverData:
         self.alg_point_geo_radius_influence = alg_dict['geo_radius_influence']
         self.alg_point_geo_neighbours = alg_dict['geo_neighbours']
         self.alg_point_geo_spatial_window = alg_dict['geo_spatial_window']
+        self.alg_point_geo_spatial_operation = alg_dict['geo_spatial_operation']
+        self.alg_point_geo_spatial_mask = alg_dict['geo_spatial_mask']
+        # operations over the cells within the radius of influence (neighbours of the point)
+        self.alg_point_geo_spatial_radius = self.alg_point_geo_spatial_operation in ['idw', 'gaussian', 'median', 'max']
 
         # source object(s)
         folder_name_tmp = self.src_dict_grid[self.grid_terrain_tag][self.folder_name_tag]
@@ -96,6 +107,18 @@ class DriverData:
             file_path_tmp,
             tags_format=template_tags_dict, tags_filling={'catchment_name': self.alg_catchment_name})[0]
 
+        # zones object(s) (optional; label grids of the zonal statistics; disabled by a null section)
+        self.src_dict_zones = {}
+        for zone_name, zone_fields in (self.src_dict_grid.get(self.grid_zones_tag, None) or {}).items():
+            if not isinstance(zone_fields, dict):
+                continue
+            zone_fields = deepcopy(zone_fields)
+            if self.file_name_tag in zone_fields:
+                zone_fields['file_path'] = fill_tags2string(
+                    os.path.join(zone_fields[self.folder_name_tag], zone_fields[self.file_name_tag]),
+                    tags_format=template_tags_dict, tags_filling={'catchment_name': self.alg_catchment_name})[0]
+            self.src_dict_zones[zone_name] = zone_fields
+
         self.file_fields_longitude_grid_tag = 'grid_longitude'
         self.file_fields_latitude_grid_tag = 'grid_latitude'
         self.file_fields_distance_grid_tag = 'grid_distance'
@@ -115,6 +138,10 @@ class DriverData:
         self.file_fields_idx_1d_point_tag = 'point_idx_1d'
         self.file_fields_idx_2d_x_point_tag = 'point_idx_2d_x'
         self.file_fields_idx_2d_y_point_tag = 'point_idx_2d_y'
+        self.file_fields_radius_point_tag = 'point_radius'
+        self.file_fields_radius_idx_1d_point_tag = 'point_radius_idx_1d'
+        self.file_fields_radius_cnet_point_tag = 'point_radius_cnet'
+        self.file_fields_radius_distance_point_tag = 'point_radius_distance'
 
         # destination object(s)
         folder_name_tmp = self.anc_dict[self.folder_name_tag]
@@ -224,12 +251,148 @@ class DriverData:
 
         # geo_point_dframe_out = geo_point_dframe_out.set_index('point_name')
 
+        # Join the cells within the radius of influence (radius operations only)
+        if self.alg_point_geo_spatial_radius:
+            geo_point_dframe_out = self.join_geo_radius(
+                geo_grid_darray_terrain, geo_grid_darray_cnet, geo_point_dframe_out)
+
         log_stream.info(' -----> Join the point and the grid information ... DONE')
 
         return geo_point_dframe_out
 
     # -------------------------------------------------------------------------------------
 
+    # -------------------------------------------------------------------------------------
+    # Method to compute the static derived fields (used by the dynamic readers at each time step)
+    def compute_geo_derived(self, geo_grid_darray_terrain, geo_grid_darray_cn):
+
+        log_stream.info(' -----> Compute the static derived fields ... ')
+
+        geo_grid_values_terrain = geo_grid_darray_terrain.values
+        geo_grid_values_cn = geo_grid_darray_cn.values
+
+        # maximum soil retention (vmax)
+        geo_grid_values_vmax = convert_cn2s(geo_grid_values_cn, geo_grid_values_terrain)
+
+        # validity mask (cells inside the domain)
+        geo_grid_mask_valid = np.logical_not(geo_grid_values_terrain < 0)
+
+        # boundary mask (first/last rows and columns)
+        geo_grid_mask_boundary = np.zeros(geo_grid_values_terrain.shape, dtype=bool)
+        geo_grid_mask_boundary[0, :] = True
+        geo_grid_mask_boundary[-1, :] = True
+        geo_grid_mask_boundary[:, 0] = True
+        geo_grid_mask_boundary[:, -1] = True
+
+        geo_data_derived = {
+            self.grid_vmax_tag: geo_grid_darray_terrain.copy(data=geo_grid_values_vmax),
+            self.grid_mask_valid_tag: geo_grid_darray_terrain.copy(data=geo_grid_mask_valid),
+            self.grid_mask_boundary_tag: geo_grid_darray_terrain.copy(data=geo_grid_mask_boundary)}
+
+        log_stream.info(' -----> Compute the static derived fields ... DONE')
+
+        return geo_data_derived
+
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # Method to compute the zones of the label grids (used by the zonal statistics at each time step)
+    def compute_geo_zones(self, geo_grid_darray_terrain, geo_grid_darray_cn, geo_grid_darray_cnet):
+
+        log_stream.info(' -----> Compute the grid zones ... ')
+
+        geo_grid_darray_static = {self.grid_terrain_tag: geo_grid_darray_terrain,
+                                  self.grid_cn_tag: geo_grid_darray_cn, self.grid_cnet_tag: geo_grid_darray_cnet}
+        geo_grid_mask_valid = np.logical_not(geo_grid_darray_terrain.values < 0)
+
+        geo_zones = {}
+        for zone_name, zone_fields in self.src_dict_zones.items():
+
+            log_stream.info(' ------> Zone "' + zone_name + '" ... ')
+
+            if 'grid' in zone_fields:
+                if zone_fields['grid'] not in geo_grid_darray_static:
+                    log_stream.error(' ===> Zone grid "' + str(zone_fields['grid']) + '" is not supported')
+                    raise NotImplementedError('Only "' + '", "'.join(geo_grid_darray_static.keys()) +
+                                              '" grids are available.')
+                geo_grid_darray_zone = geo_grid_darray_static[zone_fields['grid']]
+            elif 'file_path' in zone_fields:
+                geo_grid_darray_zone = self.get_geo_grid(zone_fields['file_path'])
+            else:
+                log_stream.error(' ===> Zone "' + zone_name + '" must be defined by "grid" or by "file_name"')
+                raise IOError('Zone grid is not defined')
+
+            if geo_grid_darray_zone.shape != geo_grid_darray_terrain.shape:
+                log_stream.error(' ===> Zone grid "' + zone_name + '" is not defined on the terrain grid')
+                raise IOError('Zone grid and terrain grid must have the same shape')
+
+            geo_zone = compute_data_zones(geo_grid_darray_zone.values, zone_mask=geo_grid_mask_valid,
+                                          zone_bins=zone_fields.get('bins', None))
+            geo_zone['definition'] = zone_fields
+            geo_zones[zone_name] = geo_zone
+
+            log_stream.info(' ------> Zone "' + zone_name + '" ... DONE [zones: ' +
+                            str(geo_zone['zones'].__len__()) + ', cells: ' + str(geo_zone['index'].shape[0]) + ']')
+
+        log_stream.info(' -----> Compute the grid zones ... DONE')
+
+        return geo_zones
+
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # Method to join the cells within the radius of influence of the points (single kd-tree query)
+    def join_geo_radius(self, geo_grid_darray_terrain, geo_grid_darray_cnet, geo_point_dframe_in):
+
+        log_stream.info(' ------> Join the cells within the radius of influence [radius: ' +
+                        str(self.alg_point_geo_radius_influence) + '] ... ')
+
+        geo_grid_x_1d = geo_grid_darray_terrain[self.geo_x_tag].values
+        geo_grid_y_1d = geo_grid_darray_terrain[self.geo_y_tag].values
+        geo_grid_x_2d, geo_grid_y_2d = np.meshgrid(geo_grid_x_1d, geo_grid_y_1d)
+        # no data cells of the channels network are not channels (values cast to int by the registry)
+        geo_grid_cnet_1d = np.nan_to_num(geo_grid_darray_cnet.values.ravel(), nan=0.0)
+
+        geo_idx_list, geo_distance_list = get_grid_idx_by_radius(
+            geo_point_dframe_in['point_longitude'].values, geo_point_dframe_in['point_latitude'].values,
+            geo_grid_x_2d, geo_grid_y_2d, geo_radius_influence=self.alg_point_geo_radius_influence)
+
+        geo_point_dframe_out = geo_point_dframe_in.copy()
+        geo_point_dframe_out[self.file_fields_radius_point_tag] = self.alg_point_geo_radius_influence
+        geo_point_dframe_out[self.file_fields_radius_idx_1d_point_tag] = [
+            geo_idx.tolist() for geo_idx in geo_idx_list]
+        geo_point_dframe_out[self.file_fields_radius_cnet_point_tag] = [
+            geo_grid_cnet_1d[geo_idx].astype(int).tolist() for geo_idx in geo_idx_list]
+        geo_point_dframe_out[self.file_fields_radius_distance_point_tag] = [
+            geo_distance.tolist() for geo_distance in geo_distance_list]
+
+        log_stream.info(' ------> Join the cells within the radius of influence [radius: ' +
+                        str(self.alg_point_geo_radius_influence) + '] ... DONE [cells: ' +
+                        str(min([geo_idx.shape[0] for geo_idx in geo_idx_list], default=0)) + ' - ' +
+                        str(max([geo_idx.shape[0] for geo_idx in geo_idx_list], default=0)) + ']')
+
+        return geo_point_dframe_out
+
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # Method to compute the operator to extract the grid values over the points
+    def compute_geo_operator(self, geo_grid_darray_terrain, geo_point_dframe):
+
+        log_stream.info(' -----> Compute the grid to point operator ... ')
+
+        geo_point_operator = compute_data_operator(
+            geo_point_dframe, geo_grid_darray_terrain.shape,
+            method_spatial_operation=self.alg_point_geo_spatial_operation,
+            method_spatial_mask=self.alg_point_geo_spatial_mask,
+            method_spatial_radius=self.alg_point_geo_radius_influence)
+
+        log_stream.info(' -----> Compute the grid to point operator ... DONE')
+
+        return geo_point_operator
+
+    # -------------------------------------------------------------------------------------
+
     # -------------------------------------------------------------------------------------
     # Method to get geo grid file
     @staticmethod
@@ -299,11 +462,21 @@ class DriverData:
             # Join grid and point datasets
             df_point_joined = self.join_geo_obj(da_terrain, da_cn, da_cnet, df_point_registry)
 
+            # Compute static derived fields
+            geo_data_derived = self.compute_geo_derived(da_terrain, da_cn)
+            # Compute grid to point operator
+            geo_data_operator = self.compute_geo_operator(da_terrain, df_point_joined)
+            # Compute grid zones
+            geo_data_zones = self.compute_geo_zones(da_terrain, da_cn, da_cnet)
+
             # Create geo data collections
             geo_data_collections = {self.grid_terrain_tag: da_terrain,
                                     self.grid_cn_tag: da_cn,
                                     self.grid_cnet_tag: da_cnet,
-                                    self.points_registry_tag: df_point_joined}
+                                    self.points_registry_tag: df_point_joined,
+                                    self.points_operator_tag: geo_data_operator,
+                                    self.grid_zones_tag: geo_data_zones,
+                                    **geo_data_derived}
 
             # Dump geo collections to destination file
             folder_name_anc, file_name_anc = os.path.split(file_path_anc)
@@ -316,6 +489,51 @@ class DriverData:
             # Read geo collections
             geo_data_collections = read_obj(file_path_anc)
 
+            # Add static derived fields (if the collections were created by a previous version)
+            flag_data_saving = False
+            geo_data_tags = [self.grid_vmax_tag, self.grid_mask_valid_tag, self.grid_mask_boundary_tag]
+            if not all(geo_data_tag in geo_data_collections for geo_data_tag in geo_data_tags):
+                geo_data_derived = self.compute_geo_derived(
+                    geo_data_collections[self.grid_terrain_tag], geo_data_collections[self.grid_cn_tag])
+                geo_data_collections = {**geo_data_collections, **geo_data_derived}
+                flag_data_saving = True
+
+            # Update the cells within the radius of influence (if not available or defined by different radius)
+            geo_point_dframe = geo_data_collections[self.points_registry_tag]
+            if self.alg_point_geo_spatial_radius and \
+                    ((self.file_fields_radius_point_tag not in geo_point_dframe.columns) or
+                     (not np.all(geo_point_dframe[self.file_fields_radius_point_tag] ==
+                                 self.alg_point_geo_radius_influence))):
+                geo_data_collections[self.points_registry_tag] = self.join_geo_radius(
+                    geo_data_collections[self.grid_terrain_tag], geo_data_collections[self.grid_cnet_tag],
+                    geo_point_dframe)
+                geo_data_collections[self.points_operator_tag] = None
+                flag_data_saving = True
+
+            # Update grid to point operator (if not available or defined by different settings)
+            geo_data_operator = geo_data_collections.get(self.points_operator_tag, None)
+            if (geo_data_operator is None) or \
+                    (geo_data_operator['operation'] != self.alg_point_geo_spatial_operation) or \
+                    (geo_data_operator['mask'] != self.alg_point_geo_spatial_mask) or \
+                    (geo_data_operator.get('radius', None) !=
+                     (self.alg_point_geo_radius_influence if self.alg_point_geo_spatial_radius else None)):
+                geo_data_collections[self.points_operator_tag] = self.compute_geo_operator(
+                    geo_data_collections[self.grid_terrain_tag], geo_data_collections[self.points_registry_tag])
+                flag_data_saving = True
+
+            # Update grid zones (if not available or defined by different settings)
+            geo_data_zones = geo_data_collections.get(self.grid_zones_tag, None)
+            if (geo_data_zones is None) or \
+                    ({zone_name: zone_obj['definition'] for zone_name, zone_obj in geo_data_zones.items()} !=
+                     self.src_dict_zones):
+                geo_data_collections[self.grid_zones_tag] = self.compute_geo_zones(
+                    geo_data_collections[self.grid_terrain_tag], geo_data_collections[self.grid_cn_tag],
+                    geo_data_collections[self.grid_cnet_tag])
+                flag_data_saving = True
+
+            if flag_data_saving:
+                write_obj(file_path_anc, geo_data_collections)
+
         # Ending info
         log_stream.info(' ----> Organize geographical information ... DONE')
 
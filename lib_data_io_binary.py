@@ -13,7 +13,8 @@ import logging
 import struct
 import numpy as np
 
-from lib_info_args import logger_name
+from lib_utils_system import unzip_filename2buffer
+from lib_info_args import logger_name, zip_extension
 
 # Logging
 log_stream = logging.getLogger(logger_name)
@@ -23,9 +24,27 @@ log_stream = logging.getLogger(logger_name)
 # -------------------------------------------------------------------------------------
 
 
+# -------------------------------------------------------------------------------------
+# Method to mask the no data cells (outside the domain and on the domain boundaries)
+def mask_data_binary(data_grid, data_geo, data_mask=None):
+
+    if data_mask is not None:
+        # precomputed mask (from the static datasets)
+        data_grid[data_mask] = np.nan
+    else:
+        data_grid[data_geo < 0] = np.nan
+        data_grid[0, :] = np.nan
+        data_grid[-1, :] = np.nan
+        data_grid[:, 0] = np.nan
+        data_grid[:, -1] = np.nan
+
+    return data_grid
+# -------------------------------------------------------------------------------------
+
+
 # -------------------------------------------------------------------------------------
 # Method to read file binary
-def read_file_binary(file_name, data_geo, scale_factor=10000):
+def read_file_binary(file_name, data_geo, scale_factor=10000, data_mask=None):
 
     file_handle = open(file_name, 'rb')
 
@@ -39,11 +58,7 @@ def read_file_binary(file_name, data_geo, scale_factor=10000):
 
     data_grid = np.float32(data_grid / scale_factor)
 
-    data_grid[data_geo < 0] = np.nan
-    data_grid[0, :] = np.nan
-    data_grid[-1, :] = np.nan
-    data_grid[:, 0] = np.nan
-    data_grid[:, -1] = np.nan
+    data_grid = mask_data_binary(data_grid, data_geo, data_mask=data_mask)
 
     # Debug
     # plt.figure()
@@ -54,3 +69,67 @@ def read_file_binary(file_name, data_geo, scale_factor=10000):
     return data_grid
 
 # -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to load file binary into a memory buffer (zipped or unzipped file)
+def load_file_binary_buffer(file_name, file_buffer, data_size=None):
+
+    if data_size is None:
+        data_size = len(file_buffer)
+    file_view = memoryview(file_buffer)[:data_size]
+
+    if file_name.endswith(zip_extension):
+        file_size = unzip_filename2buffer(file_name, file_view)
+    else:
+        with open(file_name, 'rb') as file_handle:
+            file_size = file_handle.readinto(file_view)
+
+    if file_size != data_size:
+        log_stream.error(' ===> File "' + file_name + '" is defined by ' + str(file_size) +
+                         ' bytes; the expected size is ' + str(data_size) + ' bytes')
+        raise IOError('File size is not consistent with the geographical reference')
+
+    return file_buffer
+
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to read file binary into a memory buffer (zipped or unzipped file)
+def read_file_binary_buffer(file_name, data_geo, scale_factor=10000, file_buffer=None, data_limit=None,
+                            data_mask=None, data_grid=None, file_loaded=False):
+
+    data_rows, data_cols = data_geo.shape[0], data_geo.shape[1]
+    data_n = data_rows * data_cols
+    # decode only the first "data_limit" values (fortran order); the inflating of the stream stops there
+    if (data_limit is None) or (data_limit > data_n):
+        data_limit = data_n
+    data_size = data_limit * np.dtype('<i4').itemsize
+
+    # file buffer could be previously loaded by the caller (e.g. by the prefetch threads)
+    if not file_loaded:
+        if (file_buffer is None) or (len(file_buffer) < data_size):
+            file_buffer = bytearray(data_size)
+        file_buffer = load_file_binary_buffer(file_name, file_buffer, data_size=data_size)
+
+    # data grid (float32) could be preallocated and reused by the caller
+    if data_grid is None:
+        data_grid = np.empty((data_rows, data_cols), dtype=np.float32)
+    if data_limit < data_n:
+        data_grid.fill(np.nan)
+
+    # fill the data grid column by column (fortran order) without creating temporary grids
+    data_array = np.frombuffer(file_buffer, dtype='<i4', count=data_limit)
+    data_cols_full, data_rows_rem = divmod(data_limit, data_rows)
+    np.divide(np.reshape(data_array[:data_cols_full * data_rows], (data_rows, data_cols_full), order='F'),
+              scale_factor, out=data_grid[:, :data_cols_full])
+    if data_rows_rem > 0:
+        np.divide(data_array[data_cols_full * data_rows:], scale_factor,
+                  out=data_grid[:data_rows_rem, data_cols_full])
+
+    data_grid = mask_data_binary(data_grid, data_geo, data_mask=data_mask)
+
+    return data_grid
+
+# -------------------------------------------------------------------------------------
@@ -10,7 +10,10 @@ Version:       '1.0.0'
 # -------------------------------------------------------------------------------------
 # Libraries
 import logging
+import os
+import netCDF4
 import numpy as np
+import pandas as pd
 import xarray as xr
 
 from lib_info_args import logger_name
@@ -27,11 +30,10 @@ log_stream = logging.getLogger(logger_name)
 # Method to read mat obj
 def read_file_nc(file_name, var_name='SM', geo_x_name='Longitude', geo_y_name='Latitude'):
 
-    dset_file = xr.open_dataset(file_name)
-
-    var_data = dset_file[var_name].values
-    geo_x = dset_file[geo_x_name].values
-    geo_y = dset_file[geo_y_name].values
+    with xr.open_dataset(file_name) as dset_file:
+        var_data = dset_file[var_name].values
+        geo_x = dset_file[geo_x_name].values
+        geo_y = dset_file[geo_y_name].values
 
     geo_y_upper, geo_y_lower = geo_y[0, 0], geo_y[-1, 0]
     if geo_y_lower > geo_y_upper:
@@ -41,3 +43,207 @@ def read_file_nc(file_name, var_name='SM', geo_x_name='Longitude', geo_y_name='L
     return var_data, geo_x, geo_y
 # -------------------------------------------------------------------------------------
 
+
+# -------------------------------------------------------------------------------------
+# Method to check if the file grid must be flipped (only the first and the last latitude are read)
+def read_file_nc_flip(file_name, geo_y_name='Latitude', geo_y_north_up=True):
+
+    with xr.open_dataset(file_name, cache=False) as dset_file:
+        geo_y = dset_file[geo_y_name]
+        geo_y_dim = geo_y.dims[0]
+        geo_y_upper = float(geo_y.isel({geo_y_dim: 0}).values.ravel()[0])
+        geo_y_lower = float(geo_y.isel({geo_y_dim: -1}).values.ravel()[0])
+
+    geo_flip = (geo_y_lower > geo_y_upper) == geo_y_north_up
+
+    return geo_flip
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to read the variable(s) over a window of the grid (lazy reading; window defined on the flipped grid)
+def read_file_nc_vars(file_name, var_list=None, window_y=None, window_x=None, geo_flip=False, data_grids=None):
+
+    if var_list is None:
+        var_list = ['SM']
+    if data_grids is None:
+        data_grids = {}
+
+    var_grids = {}
+    with xr.open_dataset(file_name, cache=False) as dset_file:
+
+        for var_name in var_list:
+
+            if var_name not in list(dset_file.data_vars):
+                log_stream.error(' ===> Variable "' + var_name + '" is not available in the file "' + file_name + '"')
+                raise IOError('Variable must be available in the source file')
+
+            var_obj = dset_file[var_name]
+            var_dim_y, var_dim_x = var_obj.dims[-2], var_obj.dims[-1]
+            data_rows, data_cols = var_obj.shape[-2], var_obj.shape[-1]
+
+            var_window_y = slice(0, data_rows) if window_y is None else window_y
+            var_window_x = slice(0, data_cols) if window_x is None else window_x
+
+            # rows of the window in the file grid
+            if geo_flip:
+                var_window_y_file = slice(data_rows - var_window_y.stop, data_rows - var_window_y.start)
+            else:
+                var_window_y_file = var_window_y
+
+            # select the non spatial dimension(s) [time or level] defined by a single step
+            var_dims_other = [var_dim for var_dim in var_obj.dims if var_dim not in [var_dim_y, var_dim_x]]
+            for var_dim in var_dims_other:
+                if var_obj.sizes[var_dim] != 1:
+                    log_stream.error(' ===> Variable "' + var_name + '" is defined by the dimension "' + var_dim +
+                                     '" with more than one step in the file "' + file_name + '"')
+                    raise IOError('Variable must be defined by a single step for the non spatial dimensions')
+
+            var_window_obj = var_obj.isel({var_dim_y: var_window_y_file, var_dim_x: var_window_x,
+                                           **{var_dim: 0 for var_dim in var_dims_other}})
+            var_window = var_window_obj.values
+            if geo_flip:
+                var_window = np.flip(var_window, axis=var_window_obj.get_axis_num(var_dim_y))
+
+            data_grid = data_grids.get(var_name, None)
+            if data_grid is None:
+                data_grid = np.full((data_rows, data_cols), np.nan, dtype=np.float32)
+            elif (var_window_y.stop - var_window_y.start < data_rows) or \
+                    (var_window_x.stop - var_window_x.start < data_cols):
+                data_grid.fill(np.nan)
+            data_grid[var_window_y, var_window_x] = var_window
+
+            var_grids[var_name] = data_grid
+
+    return var_grids
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to read the variable over a window of the grid (lazy reading; window defined on the flipped grid)
+def read_file_nc_window(file_name, var_name='SM', window_y=None, window_x=None, geo_flip=False, data_grid=None):
+    var_grids = read_file_nc_vars(file_name, var_list=[var_name], window_y=window_y, window_x=window_x,
+                                  geo_flip=geo_flip, data_grids={var_name: data_grid})
+    return var_grids[var_name]
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to write the statistics maps file (one map for each statistic and group)
+def write_file_stats(file_name, stats_maps, geo_x, geo_y, stats_groups, stats_attrs=None,
+                     geo_x_name='Longitude', geo_y_name='Latitude',
+                     dim_name_group='group', dim_name_x='west_east', dim_name_y='south_north'):
+
+    dset_vars = {}
+    for stats_name, stats_values in stats_maps.items():
+        dset_vars[stats_name] = xr.DataArray(stats_values, dims=[dim_name_group, dim_name_y, dim_name_x])
+
+    dset_stats = xr.Dataset(
+        dset_vars, coords={dim_name_group: (dim_name_group, list(stats_groups)),
+                           geo_x_name: (dim_name_x, geo_x), geo_y_name: (dim_name_y, geo_y)})
+    if stats_attrs is not None:
+        dset_stats.attrs.update(stats_attrs)
+
+    dset_encoding = {stats_name: {'zlib': True, 'complevel': 4} for stats_name in stats_maps.keys()}
+    dset_stats.to_netcdf(file_name, format='NETCDF4', encoding=dset_encoding)
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to create the grid cube file (time chunked and compressed netcdf4 file)
+def create_file_cube(file_name, geo_x, geo_y, time_start, time_frequency, var_name='SM', var_attrs=None,
+                     chunk_time=168, chunk_space=32, compression_level=4,
+                     geo_x_name='Longitude', geo_y_name='Latitude',
+                     dim_name_time='time', dim_name_x='west_east', dim_name_y='south_north'):
+
+    file_handle = netCDF4.Dataset(file_name, 'w', format='NETCDF4')
+
+    file_handle.createDimension(dim_name_time, None)
+    file_handle.createDimension(dim_name_y, geo_y.shape[0])
+    file_handle.createDimension(dim_name_x, geo_x.shape[0])
+
+    var_time = file_handle.createVariable(dim_name_time, 'f8', (dim_name_time,))
+    var_time.units = 'seconds since 1970-01-01 00:00:00'
+    var_time.calendar = 'gregorian'
+
+    var_geo_x = file_handle.createVariable(geo_x_name, 'f8', (dim_name_x,))
+    var_geo_x[:] = geo_x
+    var_geo_y = file_handle.createVariable(geo_y_name, 'f8', (dim_name_y,))
+    var_geo_y[:] = geo_y
+
+    var_filled = file_handle.createVariable(var_name + '_filled', 'u1', (dim_name_time,), fill_value=0)
+    var_filled.long_name = 'time step filled by the source datasets'
+
+    chunk_sizes = (chunk_time, min(chunk_space, geo_y.shape[0]), min(chunk_space, geo_x.shape[0]))
+    var_data = file_handle.createVariable(
+        var_name, 'f4', (dim_name_time, dim_name_y, dim_name_x), fill_value=np.nan,
+        zlib=True, complevel=compression_level, shuffle=True, chunksizes=chunk_sizes)
+    if var_attrs is not None:
+        var_data.setncatts(var_attrs)
+
+    file_handle.time_start = pd.Timestamp(time_start).strftime('%Y-%m-%d %H:%M')
+    file_handle.time_frequency = time_frequency
+    file_handle.chunk_time = chunk_time
+
+    return file_handle
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to open the grid cube file (read or append mode)
+def open_file_cube(file_name, file_mode='r'):
+
+    if not os.path.exists(file_name):
+        log_stream.error(' ===> Grid cube file "' + file_name + '" does not exist')
+        raise FileNotFoundError('File must be available to read the grid cube')
+
+    file_handle = netCDF4.Dataset(file_name, file_mode)
+    file_handle.set_auto_mask(False)
+
+    return file_handle
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to get the time information of the grid cube file
+def get_file_cube_time(file_handle, var_name='SM', dim_name_time='time'):
+
+    time_start = pd.Timestamp(file_handle.time_start)
+    time_frequency = file_handle.time_frequency
+    chunk_time = int(file_handle.chunk_time)
+
+    time_n = file_handle.dimensions[dim_name_time].size
+    time_range = pd.date_range(start=time_start, periods=time_n, freq=time_frequency)
+    time_filled = np.asarray(file_handle.variables[var_name + '_filled'][:time_n], dtype=bool)
+
+    return time_start, time_frequency, chunk_time, time_range, time_filled
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to write the time steps in the grid cube file (the unlimited time dimension is extended)
+def write_file_cube_time(file_handle, time_idx_start, time_range, dim_name_time='time'):
+    time_idx_end = time_idx_start + time_range.__len__()
+    file_handle.variables[dim_name_time][time_idx_start:time_idx_end] = \
+        (time_range - pd.Timestamp('1970-01-01')).total_seconds().values
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to write a time block in the grid cube file
+def write_file_cube_block(file_handle, block_idx_start, block_data, block_filled, var_name='SM'):
+
+    block_idx_end = block_idx_start + block_data.shape[0]
+
+    file_handle.variables[var_name][block_idx_start:block_idx_end, :, :] = block_data
+    file_handle.variables[var_name + '_filled'][block_idx_start:block_idx_end] = block_filled.astype(np.uint8)
+    file_handle.sync()
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to read a time block in the grid cube file (optionally over a spatial window)
+def read_file_cube_block(file_handle, block_idx_start, block_idx_end, var_name='SM',
+                         window_y=slice(None), window_x=slice(None)):
+    return file_handle.variables[var_name][block_idx_start:block_idx_end, window_y, window_x]
+# -------------------------------------------------------------------------------------
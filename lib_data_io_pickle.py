@@ -34,10 +34,10 @@ def read_obj(file_name):
 
 
 # -------------------------------------------------------------------------------------
-# Method to write data obj
+# Method to write data obj (the previous file is replaced only when the new one is completely written)
 def write_obj(file_name, data):
-    if os.path.exists(file_name):
-        os.remove(file_name)
-    with open(file_name, 'wb') as handle:
+    file_name_tmp = file_name + '.tmp'
+    with open(file_name_tmp, 'wb') as handle:
         pickle.dump(data, handle, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(file_name_tmp, file_name)
 # -------------------------------------------------------------------------------------
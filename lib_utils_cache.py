@@ -0,0 +1,243 @@
+"""
+Library Features:
+
+Name:          lib_utils_cache
+Author(s):     Fabio Delogu (fabio.delogu@cimafoundation.org)
+Date:          '20221125'
+Version:       '1.0.0'
+"""
+
+# -------------------------------------------------------------------------------------
+# Libraries
+import logging
+import hashlib
+import os
+import numpy as np
+import pandas as pd
+
+from lib_info_args import logger_name
+
+# Logging
+log_stream = logging.getLogger(logger_name)
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to update the cache hash with an element (arrays and pandas objects hashed by their values; lists, tuples,
+# sets and dicts hashed by their items)
+def update_cache_hash(tag_hash, tag_element):
+
+    if isinstance(tag_element, np.ndarray):
+        tag_hash.update(str((tag_element.dtype.str, tag_element.shape)).encode('utf-8'))
+        if tag_element.dtype.hasobject:
+            for tag_item in tag_element.ravel():
+                update_cache_hash(tag_hash, tag_item)
+        else:
+            tag_hash.update(np.ascontiguousarray(tag_element).tobytes())
+    elif isinstance(tag_element, (pd.DataFrame, pd.Series, pd.Index)):
+        if isinstance(tag_element, pd.DataFrame):
+            update_cache_hash(tag_hash, list(tag_element.columns))
+        tag_hash.update(pd.util.hash_pandas_object(tag_element).values.tobytes())
+    elif isinstance(tag_element, dict):
+        tag_hash.update(b'{')
+        for tag_key in sorted(tag_element.keys(), key=str):
+            update_cache_hash(tag_hash, tag_key)
+            update_cache_hash(tag_hash, tag_element[tag_key])
+        tag_hash.update(b'}')
+    elif isinstance(tag_element, (list, tuple, set, frozenset)):
+        if isinstance(tag_element, (set, frozenset)):
+            tag_element = sorted(tag_element, key=str)
+        tag_hash.update(b'[')
+        for tag_item in tag_element:
+            update_cache_hash(tag_hash, tag_item)
+        tag_hash.update(b']')
+    else:
+        tag_hash.update(str(tag_element).encode('utf-8'))
+    tag_hash.update(b'|')
+
+    return tag_hash
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to define the cache tag (settings that change the cached datasets)
+def define_cache_tag(*tag_elements):
+
+    tag_hash = hashlib.md5()
+    for tag_element in tag_elements:
+        update_cache_hash(tag_hash, tag_element)
+
+    return tag_hash.hexdigest()
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to define the file fingerprint (modification time and size)
+def define_file_fingerprint(file_name):
+    file_stat = os.stat(file_name)
+    return file_stat.st_mtime_ns, file_stat.st_size
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to define the cache file (keyed by source path, modification time, size and cache tag)
+def define_cache_file(file_name, cache_folder, cache_tag='', cache_ext='.npy'):
+
+    file_mtime, file_size = define_file_fingerprint(file_name)
+    file_key = '|'.join([os.path.abspath(file_name), str(file_mtime), str(file_size), cache_tag])
+    cache_name = hashlib.md5(file_key.encode('utf-8')).hexdigest() + cache_ext
+
+    return os.path.join(cache_folder, cache_name)
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to read the cache grid (memory mapped; the access time is updated for the lru eviction)
+def read_cache_grid(cache_file):
+
+    try:
+        cache_grid = np.load(cache_file, mmap_mode='r')
+        os.utime(cache_file)
+    except (OSError, ValueError):
+        # cache file removed by the eviction or not completely written
+        cache_grid = None
+
+    return cache_grid
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to write the cache grid (atomic replace to avoid partial files)
+def write_cache_grid(cache_file, cache_grid):
+
+    cache_tmp = cache_file + '.' + str(os.getpid()) + '.tmp'
+    with open(cache_tmp, 'wb') as cache_handle:
+        np.save(cache_handle, np.asarray(cache_grid, dtype=np.float32))
+    os.replace(cache_tmp, cache_file)
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to copy the cache grid into the data grid
+def copy_cache_grid(cache_grid, data_grid=None):
+
+    if data_grid is None:
+        data_grid = np.array(cache_grid, dtype=np.float32)
+    else:
+        np.copyto(data_grid, cache_grid)
+
+    return data_grid
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to read the cache mat (parsed times and values of a memory mapped record array; the access time is updated
+# for the lru eviction)
+def read_cache_mat(cache_file):
+
+    try:
+        cache_records = np.load(cache_file, mmap_mode='r')
+        cache_obj = {'time': cache_records['time'], 'values': cache_records['values']}
+        os.utime(cache_file)
+    except (OSError, ValueError, KeyError, IndexError):
+        # cache file not available, removed by the eviction or not completely written
+        cache_obj = None
+
+    return cache_obj
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to write the cache mat (record array of the times as int64 and the values as float64, lossless with respect
+# to the source values; atomic replace to avoid partial files)
+def write_cache_mat(cache_file, cache_time, cache_values):
+
+    cache_records = np.empty(np.asarray(cache_time).shape[0], dtype=[('time', np.int64), ('values', np.float64)])
+    cache_records['time'] = cache_time
+    cache_records['values'] = cache_values
+
+    cache_tmp = cache_file + '.' + str(os.getpid()) + '.tmp'
+    with open(cache_tmp, 'wb') as cache_handle:
+        np.save(cache_handle, cache_records)
+    os.replace(cache_tmp, cache_file)
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to evict the least recently used cache files (cache size capped by the byte budget; the files are evicted
+# down to the target size if defined; the cache size after the eviction is returned)
+def evict_cache_folder(cache_folder, cache_size_max, cache_ext='.npy', cache_size_target=None):
+
+    if (cache_size_max is None) or (not os.path.exists(cache_folder)):
+        return 0
+
+    if cache_size_target is None:
+        cache_size_target = cache_size_max
+
+    cache_entries, cache_size = [], 0
+    with os.scandir(cache_folder) as cache_iterator:
+        for cache_entry in cache_iterator:
+            if cache_entry.is_file() and cache_entry.name.endswith(cache_ext):
+                try:
+                    cache_stat = cache_entry.stat()
+                except FileNotFoundError:
+                    # cache file removed by another worker during the scan
+                    continue
+                cache_entries.append((cache_stat.st_mtime, cache_stat.st_size, cache_entry.path))
+                cache_size += cache_stat.st_size
+
+    cache_removed = 0
+    if cache_size > cache_size_max:
+        for cache_mtime, cache_file_size, cache_file in sorted(cache_entries):
+            try:
+                os.remove(cache_file)
+            except FileNotFoundError:
+                # cache file previously removed by another worker
+                pass
+            cache_size -= cache_file_size
+            cache_removed += 1
+            if cache_size <= cache_size_target:
+                break
+
+        log_stream.info(' -------> Cache "' + cache_folder + '" ... EVICTED [files: ' + str(cache_removed) + ']')
+
+    return cache_size
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to create the cache budget (running size of the cache folder; the folder is scanned only when the running
+# size is over the byte budget)
+def create_cache_budget(cache_folder, cache_size_max, cache_ext='.npy', cache_size_ratio=0.9):
+
+    cache_budget = {'folder': cache_folder, 'size_max': cache_size_max, 'ext': cache_ext, 'size': 0,
+                    'size_target': None if cache_size_max is None else int(cache_size_max * cache_size_ratio)}
+    cache_budget['size'] = evict_cache_folder(
+        cache_folder, cache_size_max, cache_ext=cache_ext, cache_size_target=cache_budget['size_target'])
+
+    return cache_budget
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to update the cache budget with the written cache files (evicted down to the target size when the running
+# size is over the byte budget; the files written by other workers are counted by the folder scan)
+def update_cache_budget(cache_budget, cache_files):
+
+    if cache_budget['size_max'] is None:
+        return cache_budget
+
+    for cache_file in cache_files:
+        try:
+            cache_budget['size'] += os.path.getsize(cache_file)
+        except OSError:
+            # cache file not written or removed by another worker
+            pass
+
+    if cache_budget['size'] > cache_budget['size_max']:
+        cache_budget['size'] = evict_cache_folder(
+            cache_budget['folder'], cache_budget['size_max'], cache_ext=cache_budget['ext'],
+            cache_size_target=cache_budget['size_target'])
+
+    return cache_budget
+# -------------------------------------------------------------------------------------
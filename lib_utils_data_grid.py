@@ -10,15 +10,25 @@ Version:       '1.0.0'
 #######################################################################################
 # Libraries
 import logging
+import os
+import warnings
 import numpy as np
 import pandas as pd
+import scipy.sparse
 
-from lib_data_io_nc import read_file_nc
-from lib_data_io_binary import read_file_binary
+from lib_data_io_nc import read_file_nc_flip, read_file_nc_window, read_file_nc_vars, \
+    create_file_cube, open_file_cube, get_file_cube_time, read_file_cube_block, write_file_cube_block, \
+    write_file_cube_time
+from lib_data_io_binary import read_file_binary, read_file_binary_buffer, load_file_binary_buffer
 
 from lib_utils_obj import create_darray_2d
 from lib_utils_geo import convert_cn2s
-from lib_info_args import logger_name
+from lib_utils_process import get_process_data, run_thread_prefetch, collect_process_logs
+from lib_utils_stats import create_data_stats, update_data_stats, create_data_corr, update_data_corr, flush_data_corr
+from lib_utils_cache import define_cache_tag, define_cache_file, read_cache_grid, write_cache_grid, \
+    copy_cache_grid, create_cache_budget, update_cache_budget
+from lib_utils_system import unzip_filename, change_extension, make_folder
+from lib_info_args import logger_name, zip_extension
 
 # Logging
 log_stream = logging.getLogger(logger_name)
@@ -29,28 +39,319 @@ log_stream = logging.getLogger(logger_name)
 
 
 # -------------------------------------------------------------------------------------
-# Method to join data point
-def join_data_point(point_time, point_data, point_collection):
+# Method to create data collection (preallocated time x points array)
+def create_data_collection(time_range, point_names, data_type=np.float32):
 
-    if point_collection is None:
-        point_collection = pd.DataFrame(data=point_data, index=[point_time])
-    else:
-        # Create tmp collection
-        tmp_collection = pd.DataFrame(data=point_data, index=[point_time])
-        # append new line to dataframe
-        point_collection = pd.concat([point_collection, tmp_collection])
+    point_collection = {
+        'time': pd.DatetimeIndex(time_range), 'points': list(point_names),
+        'values': np.full((time_range.__len__(), point_names.__len__()), np.nan, dtype=data_type),
+        'filled': np.zeros(time_range.__len__(), dtype=bool)}
+
+    return point_collection
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to fill data collection by time position
+def fill_data_collection(point_time, point_data, point_collection):
+
+    time_idx = point_collection['time'].get_loc(point_time)
+
+    if isinstance(point_data, dict):
+        point_data = [point_data[point_name] for point_name in point_collection['points']]
+
+    point_collection['values'][time_idx, :] = point_data
+    point_collection['filled'][time_idx] = True
+
+    return point_collection
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to join a data collection chunk to the data collection by time position
+def join_data_collection(point_collection, point_collection_chunk):
+
+    time_idx = point_collection['time'].get_indexer(point_collection_chunk['time'])
+
+    point_collection['values'][time_idx, :] = point_collection_chunk['values']
+    point_collection['filled'][time_idx] = point_collection_chunk['filled']
 
     return point_collection
 # -------------------------------------------------------------------------------------
 
 
+# -------------------------------------------------------------------------------------
+# Method to convert data collection to dataframe (only the filled time steps)
+def convert_data_collection(point_collection):
+
+    time_filled = point_collection['filled']
+    if not np.any(time_filled):
+        return None
+
+    # columns defined by tuples (e.g. statistic and zone) are organized in levels
+    point_columns = point_collection['points']
+    if point_columns and all(isinstance(point_column, tuple) for point_column in point_columns):
+        point_columns = pd.MultiIndex.from_tuples(point_columns)
+
+    point_dframe = pd.DataFrame(
+        data=point_collection['values'][time_filled, :],
+        index=point_collection['time'][time_filled], columns=point_columns)
+
+    return point_dframe
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to compute the number of grid values (fortran order) needed by the point(s) and by the operator
+def compute_data_limit(dframe_points, data_shape, data_operator=None):
+
+    point_idx_1d_list = []
+    for point_id, point_row in dframe_points.iterrows():
+        point_idx_1d_tmp = point_row['point_idx_1d']
+        if not isinstance(point_idx_1d_tmp, list):
+            point_idx_1d_tmp = [point_idx_1d_tmp]
+        point_idx_1d_list.extend(point_idx_1d_tmp)
+    # cells used by the extraction operator (e.g. cells within the radius of influence)
+    if data_operator is not None:
+        point_idx_1d_list.extend(data_operator['matrix'].indices.tolist())
+
+    point_idx_y, point_idx_x = np.unravel_index(np.array(point_idx_1d_list, dtype=int), data_shape)
+    point_idx_1d_f = np.ravel_multi_index((point_idx_y, point_idx_x), data_shape, order='F')
+
+    data_limit = int(np.max(point_idx_1d_f)) + 1
+
+    return data_limit
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to compute the window of the grid (bounding box of the registry cells and of the operator cells)
+def compute_data_window(dframe_points, data_shape, data_operator=None):
+
+    point_idx_1d_list = []
+    for point_id, point_row in dframe_points.iterrows():
+        point_idx_1d_tmp = point_row['point_idx_1d']
+        if not isinstance(point_idx_1d_tmp, list):
+            point_idx_1d_tmp = [point_idx_1d_tmp]
+        point_idx_1d_list.extend(point_idx_1d_tmp)
+    # cells used by the extraction operator (e.g. cells within the radius of influence)
+    if data_operator is not None:
+        point_idx_1d_list.extend(data_operator['matrix'].indices.tolist())
+
+    point_idx_y, point_idx_x = np.unravel_index(np.array(point_idx_1d_list, dtype=int), data_shape)
+
+    window_y = slice(int(np.min(point_idx_y)), int(np.max(point_idx_y)) + 1)
+    window_x = slice(int(np.min(point_idx_x)), int(np.max(point_idx_x)) + 1)
+
+    return window_y, window_x
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to check the orientation of the reference grid
+def is_geo_north_up(da_geo, geo_y_tag='Latitude'):
+    geo_y_values = da_geo[geo_y_tag].values
+    if geo_y_values.ndim > 1:
+        geo_y_values = geo_y_values[:, 0]
+    return bool(geo_y_values[0] > geo_y_values[-1])
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to define the gather indexes of the operator (cells of each point padded to the max number of cells)
+def define_data_gather(point_matrix):
+
+    point_cells_n = np.diff(point_matrix.indptr)
+    gather_n = max(int(point_cells_n.max()) if point_cells_n.size > 0 else 0, 1)
+
+    gather_valid = np.arange(gather_n)[np.newaxis, :] < point_cells_n[:, np.newaxis]
+    gather_index = np.zeros(gather_valid.shape, dtype=np.int64)
+    gather_index[gather_valid] = point_matrix.indices
+
+    return gather_index, gather_valid
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to compute the (sparse) operator to extract grid values to point values
+def compute_data_operator(dframe_points, data_shape, method_spatial_operation='average',
+                          method_spatial_mask=True, value_spatial_mask=1, method_spatial_radius=None,
+                          weight_power=2.0, weight_sigma=None, weight_distance_min=1.0):
+
+    if method_spatial_operation not in ['average', 'idw', 'gaussian', 'median', 'max']:
+        log_stream.error(' ===> Spatial data operation "' + method_spatial_operation + '" is not supported')
+        raise NotImplementedError('Case not implemented yet. Only "average", "idw", "gaussian", "median" and '
+                                  '"max" methods are available.')
+
+    # cells of the spatial window ("average") or cells within the radius of influence (other operations)
+    flag_radius = method_spatial_operation != 'average'
+    if flag_radius:
+        if 'point_radius_idx_1d' not in dframe_points.columns:
+            log_stream.error(' ===> Spatial data operation "' + method_spatial_operation +
+                             '" needs the cells within the radius of influence of the points')
+            raise IOError('Points must be joined with the cells within the radius of influence')
+        point_idx_tag, point_cnet_tag = 'point_radius_idx_1d', 'point_radius_cnet'
+        if weight_sigma is None:
+            weight_sigma = method_spatial_radius / 2.0
+    else:
+        point_idx_tag, point_cnet_tag = 'point_idx_1d', 'point_cnet'
+
+    data_n = int(np.prod(data_shape))
+
+    point_name_list, point_row_list, point_col_list, point_weight_list = [], [], [], []
+    for point_id, (point_index, point_row) in enumerate(dframe_points.iterrows()):
+        point_name = point_row['point_name']
+        point_idx_1d_list = point_row[point_idx_tag]
+        point_cnet_list = point_row[point_cnet_tag]
+
+        if not isinstance(point_idx_1d_list, list):
+            point_idx_1d_list = [point_idx_1d_list]
+        if not isinstance(point_cnet_list, list):
+            point_cnet_list = [point_cnet_list]
+
+        if flag_radius:
+            point_distance = np.array(point_row['point_radius_distance'], dtype=float)
+        else:
+            point_distance = np.zeros(point_idx_1d_list.__len__())
+
+        if method_spatial_operation == 'idw':
+            point_weight = 1.0 / np.power(np.maximum(point_distance, weight_distance_min), weight_power)
+        elif method_spatial_operation == 'gaussian':
+            point_weight = np.exp(-0.5 * np.square(point_distance / weight_sigma))
+        else:
+            point_weight = np.ones(point_distance.shape[0])
+
+        for point_idx_1d_step, point_cnet_step, point_weight_step in zip(
+                point_idx_1d_list, point_cnet_list, point_weight):
+            if method_spatial_mask and (point_cnet_step == value_spatial_mask):
+                continue
+            point_row_list.append(point_id)
+            point_col_list.append(int(point_idx_1d_step))
+            point_weight_list.append(float(point_weight_step))
+
+        point_name_list.append(point_name)
+
+    point_matrix = scipy.sparse.csr_matrix(
+        (point_weight_list, (point_row_list, point_col_list)), shape=(point_name_list.__len__(), data_n))
+    point_matrix.sort_indices()
+    point_weights_sum = np.asarray(point_matrix.sum(axis=1)).ravel()
+
+    data_operator = {'matrix': point_matrix, 'weights_sum': point_weights_sum,
+                     'valid': point_weights_sum > 0, 'points': point_name_list,
+                     'operation': method_spatial_operation, 'mask': method_spatial_mask,
+                     'radius': method_spatial_radius if flag_radius else None}
+
+    # order statistics are computed over the gathered cells of each point
+    if method_spatial_operation in ['median', 'max']:
+        data_operator['gather_index'], data_operator['gather_valid'] = define_data_gather(point_matrix)
+
+    return data_operator
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to extract grid values to point values using the sparse operator (one or more frames)
+def extract_data_grid2point_by_operator(da_sm, data_operator):
+
+    if isinstance(da_sm, np.ndarray):
+        values_sm = da_sm
+    else:
+        values_sm = da_sm.values
+
+    point_matrix = data_operator['matrix']
+    point_weights_sum = data_operator['weights_sum']
+    point_valid = data_operator['valid']
+    point_operation = data_operator.get('operation', 'average')
+
+    if values_sm.ndim == 2 and values_sm.shape[1] == point_matrix.shape[1]:
+        # stacked frames [time, cells]
+        values_cells, flag_frames = values_sm, True
+    elif values_sm.ndim == 2 and values_sm.shape[0] * values_sm.shape[1] == point_matrix.shape[1]:
+        # one frame [y, x]
+        values_cells, flag_frames = values_sm.ravel(), False
+    elif values_sm.ndim == 3:
+        # stacked frames [time, y, x]
+        values_cells, flag_frames = values_sm.reshape(values_sm.shape[0], -1), True
+    else:
+        log_stream.error(' ===> Data shape is not consistent with the extraction operator')
+        raise IOError('Data shape is not valid')
+
+    if point_operation in ['median', 'max']:
+        # order statistics of the valid cells (gather of the point cells)
+        values_gather = values_cells[..., data_operator['gather_index']].astype(float)
+        values_gather[..., ~data_operator['gather_valid']] = np.nan
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            if point_operation == 'median':
+                point_values = np.nanmedian(values_gather, axis=-1)
+            else:
+                point_values = np.nanmax(values_gather, axis=-1)
+    elif point_operation in ['idw', 'gaussian']:
+        # weighted average of the valid cells (weights normalized by the valid cells of each frame)
+        values_finite = np.isfinite(values_cells)
+        values_filled = np.where(values_finite, values_cells, 0.0)
+        if flag_frames:
+            point_values = point_matrix.dot(values_filled.T).T
+            point_weights_valid = point_matrix.dot(values_finite.T.astype(float)).T
+        else:
+            point_values = point_matrix.dot(values_filled)
+            point_weights_valid = point_matrix.dot(values_finite.astype(float))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            point_values = point_values / point_weights_valid
+        point_values[point_weights_valid == 0] = np.nan
+    else:
+        if flag_frames:
+            point_values = point_matrix.dot(values_cells.T).T
+        else:
+            point_values = point_matrix.dot(values_cells)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            point_values = point_values / point_weights_sum
+    point_values[..., ~point_valid] = np.nan
+
+    return point_values
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to crop the extraction operator over the window of the used cells
+def crop_data_operator(data_operator, data_shape):
+
+    point_matrix = data_operator['matrix']
+    data_cols = data_shape[1]
+
+    cell_idx = point_matrix.indices
+    cell_y, cell_x = np.divmod(cell_idx, data_cols)
+    if cell_idx.size > 0:
+        window_y = slice(int(cell_y.min()), int(cell_y.max()) + 1)
+        window_x = slice(int(cell_x.min()), int(cell_x.max()) + 1)
+    else:
+        window_y, window_x = slice(0, 1), slice(0, 1)
+    window_rows, window_cols = window_y.stop - window_y.start, window_x.stop - window_x.start
+
+    window_idx = (cell_y - window_y.start) * window_cols + (cell_x - window_x.start)
+    window_matrix = scipy.sparse.csr_matrix(
+        (point_matrix.data, window_idx, point_matrix.indptr),
+        shape=(point_matrix.shape[0], window_rows * window_cols))
+
+    window_operator = dict(data_operator)
+    window_operator['matrix'] = window_matrix
+    if 'gather_index' in data_operator:
+        window_operator['gather_index'], window_operator['gather_valid'] = define_data_gather(window_matrix)
+
+    return window_y, window_x, window_operator
+# -------------------------------------------------------------------------------------
+
+
 # -------------------------------------------------------------------------------------
 # Method to extract grid values to point values
 def extract_data_grid2point(
         da_sm, dframe_points, method_spatial_operation='average',
         method_spatial_mask=True, value_spatial_mask=1):
 
-    values_sm = da_sm.values.ravel()
+    if isinstance(da_sm, np.ndarray):
+        values_sm = da_sm.ravel()
+    else:
+        values_sm = da_sm.values.ravel()
 
     point_data = {}
     for point_id, point_row in dframe_points.iterrows():
@@ -86,21 +387,148 @@ def extract_data_grid2point(
 # -------------------------------------------------------------------------------------
 
 
+# -------------------------------------------------------------------------------------
+# Method to compute the zones of a label grid (flat index and zone label of the valid cells)
+def compute_data_zones(zone_values, zone_mask=None, zone_bins=None):
+
+    zone_values = np.asarray(zone_values)
+
+    # cells with no data values (nan or negative labels) are not assigned to any zone
+    zone_valid = np.isfinite(zone_values)
+    zone_valid[zone_valid] = zone_values[zone_valid] >= 0
+    if zone_mask is not None:
+        zone_valid = np.logical_and(zone_valid, zone_mask)
+
+    zone_index = np.flatnonzero(zone_valid.ravel())
+    zone_values_valid = zone_values.ravel()[zone_index]
+
+    if zone_bins is not None:
+        # classes defined by the bins edges [start, end) and the last class closed [start, end] (values outside the
+        # edges are not assigned)
+        zone_names = [str(bin_start) + '_' + str(bin_end) for bin_start, bin_end in zip(zone_bins[:-1], zone_bins[1:])]
+        zone_bins = np.asarray(zone_bins, dtype=float)
+        zone_labels = np.digitize(zone_values_valid, zone_bins) - 1
+        zone_labels[zone_values_valid == zone_bins[-1]] = zone_names.__len__() - 1
+        zone_select = (zone_labels >= 0) & (zone_labels < zone_names.__len__())
+        zone_index, zone_labels = zone_index[zone_select], zone_labels[zone_select]
+    else:
+        # classes defined by the unique values of the grid
+        zone_unique, zone_labels = np.unique(zone_values_valid, return_inverse=True)
+        if np.all(zone_unique == np.round(zone_unique)):
+            zone_unique = zone_unique.astype(np.int64)
+        zone_names = [str(zone_value) for zone_value in zone_unique]
+
+    zone_obj = {'index': zone_index.astype(np.int64), 'labels': zone_labels.astype(np.int64),
+                'zones': zone_names, 'count': np.bincount(zone_labels, minlength=zone_names.__len__())}
+
+    return zone_obj
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to define the columns of the zonal statistics (mean, std and count for each zone)
+def define_data_zones_columns(zone_obj):
+    return [(zone_stat, zone_name) for zone_stat in ['mean', 'std', 'count'] for zone_name in zone_obj['zones']]
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to extract grid values to zonal statistics (mean, std and count of the valid cells by bincount)
+def extract_data_grid2zone(da_sm, zone_obj):
+
+    if isinstance(da_sm, np.ndarray):
+        values_sm = da_sm.ravel()
+    else:
+        values_sm = da_sm.values.ravel()
+
+    zone_n = zone_obj['zones'].__len__()
+
+    zone_values = values_sm[zone_obj['index']].astype(np.float64)
+    zone_finite = np.isfinite(zone_values)
+    zone_labels, zone_values = zone_obj['labels'][zone_finite], zone_values[zone_finite]
+
+    zone_count = np.bincount(zone_labels, minlength=zone_n).astype(np.float64)
+    zone_sum = np.bincount(zone_labels, weights=zone_values, minlength=zone_n)
+    zone_sum_sq = np.bincount(zone_labels, weights=zone_values * zone_values, minlength=zone_n)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        zone_mean = zone_sum / zone_count
+        zone_std = np.sqrt(np.maximum(zone_sum_sq / zone_count - zone_mean * zone_mean, 0.0))
+
+    return np.concatenate([zone_mean, zone_std, zone_count])
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to apply masks, limits and scale factor in place (float32 values without temporary grids)
+def apply_data_limits(sm_values, cnet_values, mask_cnet=True, mask_limits=True, mask_buffer=None,
+                      value_cnet_mask=1, value_sm_mask=-1,
+                      value_sm_min=0.0, value_sm_max=1.0, var_sm_scale_factor=100.0):
+
+    if mask_buffer is None:
+        mask_buffer = np.empty(sm_values.shape, dtype=bool)
+
+    if mask_cnet:
+        np.equal(cnet_values, value_cnet_mask, out=mask_buffer)
+        np.copyto(sm_values, value_sm_mask, where=mask_buffer)
+
+    if mask_limits:
+        np.less(sm_values, value_sm_min, out=mask_buffer)
+        np.copyto(sm_values, np.nan, where=mask_buffer)
+        np.greater(sm_values, value_sm_max, out=mask_buffer)
+        np.copyto(sm_values, np.nan, where=mask_buffer)
+
+    np.multiply(sm_values, var_sm_scale_factor, out=sm_values)
+
+    return sm_values
+# -------------------------------------------------------------------------------------
+
+
 # -------------------------------------------------------------------------------------
 # Method to get data binary
 def get_data_binary(file_name, da_geo, da_cn, da_cnet=None, mask_cnet=True, mask_limits=True,
                     geo_x_tag='Longitude', geo_y_tag='Latitude',
                     value_cnet_mask=1, value_sm_mask=-1,
-                    value_sm_min=0.0, value_sm_max=1.0, var_sm_scale_factor=100.0):
+                    value_sm_min=0.0, value_sm_max=1.0, var_sm_scale_factor=100.0,
+                    file_buffer=None, data_limit=None, da_vmax=None, mask_nodata=None,
+                    data_buffer=None, mask_buffer=None, output_format='data_array', file_loaded=False,
+                    cache_grid=None, cache_file=None):
 
-    geo_x_1d = da_geo[geo_x_tag]
-    geo_y_1d = da_geo[geo_y_tag]
+    geo_x_1d = da_geo[geo_x_tag].values
+    geo_y_1d = da_geo[geo_y_tag].values
     geo_values = da_geo.values
     cn_values = da_cn.values
     cnet_values = da_cnet.values
 
-    vtot_values = read_file_binary(file_name, data_geo=geo_values)
-    vmax_values = convert_cn2s(cn_values, geo_values)
+    if cache_grid is not None:
+        vtot_values = copy_cache_grid(cache_grid, data_grid=data_buffer)
+    elif file_buffer is not None:
+        vtot_values = read_file_binary_buffer(
+            file_name, data_geo=geo_values, file_buffer=file_buffer, data_limit=data_limit, data_mask=mask_nodata,
+            data_grid=data_buffer, file_loaded=file_loaded)
+    else:
+        vtot_values = read_file_binary(file_name, data_geo=geo_values, data_mask=mask_nodata)
+
+    # save the decoded grid in the cache (before the in place computation)
+    if (cache_grid is None) and (cache_file is not None):
+        write_cache_grid(cache_file, vtot_values)
+
+    if da_vmax is not None:
+        vmax_values = da_vmax.values
+    else:
+        vmax_values = convert_cn2s(cn_values, geo_values)
+
+    if output_format == 'array':
+        sm_values = np.divide(vtot_values, vmax_values, out=vtot_values)
+        sm_values = apply_data_limits(
+            sm_values, cnet_values, mask_cnet=mask_cnet, mask_limits=mask_limits, mask_buffer=mask_buffer,
+            value_cnet_mask=value_cnet_mask, value_sm_mask=value_sm_mask,
+            value_sm_min=value_sm_min, value_sm_max=value_sm_max, var_sm_scale_factor=var_sm_scale_factor)
+        return sm_values
+    elif output_format != 'data_array':
+        log_stream.error(' ===> Output format "' + output_format + '" is not supported')
+        raise NotImplementedError('Case not implemented yet. Only "data_array" and "array" formats are available.')
+
     sm_values = vtot_values / vmax_values
 
     if mask_cnet:
@@ -123,17 +551,45 @@ def get_data_binary(file_name, da_geo, da_cn, da_cnet=None, mask_cnet=True, mask
 # -------------------------------------------------------------------------------------
 # Method to get data netcdf
 def get_data_nc(file_name, da_geo, da_cn, da_cnet=None, mask_cnet=True, mask_limits=True,
-                geo_x_tag='west_east', geo_y_tag='south_north',
+                geo_x_tag='Longitude', geo_y_tag='Latitude',
                 value_cnet_mask=1, value_sm_mask=-1,
-                value_sm_min=0, value_sm_max=1, var_sm_scale_factor=100.0):
+                value_sm_min=0, value_sm_max=1, var_sm_scale_factor=100.0,
+                data_window=None, geo_flip=None, data_buffer=None, mask_buffer=None, output_format='data_array',
+                cache_grid=None, cache_file=None, var_name='SM', data_values=None):
 
-    geo_x_1d = da_geo[geo_x_tag].values
-    geo_y_1d = da_geo[geo_y_tag].values
-    # geo_values = da_geo.values
-    # cn_values = da_cn.values
     cnet_values = da_cnet.values
 
-    sm_values, geo_x_values, geo_y_values = read_file_nc(file_name)
+    if cache_grid is not None:
+        sm_values = copy_cache_grid(cache_grid, data_grid=data_buffer)
+    elif data_values is not None:
+        # values previously read with the other variable(s) of the file
+        sm_values = data_values
+        if cache_file is not None:
+            write_cache_grid(cache_file, sm_values)
+    else:
+        if geo_flip is None:
+            geo_flip = read_file_nc_flip(file_name, geo_y_north_up=is_geo_north_up(da_geo, geo_y_tag=geo_y_tag))
+
+        window_y, window_x = (None, None) if data_window is None else data_window
+        sm_values = read_file_nc_window(file_name, var_name=var_name, window_y=window_y, window_x=window_x,
+                                        geo_flip=geo_flip, data_grid=data_buffer)
+
+        # save the decoded grid in the cache (before the in place computation)
+        if cache_file is not None:
+            write_cache_grid(cache_file, sm_values)
+
+    if output_format == 'array':
+        sm_values = apply_data_limits(
+            sm_values, cnet_values, mask_cnet=mask_cnet, mask_limits=mask_limits, mask_buffer=mask_buffer,
+            value_cnet_mask=value_cnet_mask, value_sm_mask=value_sm_mask,
+            value_sm_min=value_sm_min, value_sm_max=value_sm_max, var_sm_scale_factor=var_sm_scale_factor)
+        return sm_values
+    elif output_format != 'data_array':
+        log_stream.error(' ===> Output format "' + output_format + '" is not supported')
+        raise NotImplementedError('Case not implemented yet. Only "data_array" and "array" formats are available.')
+
+    geo_x_1d = da_geo[geo_x_tag].values
+    geo_y_1d = da_geo[geo_y_tag].values
 
     if mask_cnet:
         sm_values[cnet_values == value_cnet_mask] = value_sm_mask
@@ -145,9 +601,431 @@ def get_data_nc(file_name, da_geo, da_cn, da_cnet=None, mask_cnet=True, mask_lim
     sm_values = sm_values * var_sm_scale_factor
 
     da_sm = create_darray_2d(sm_values, geo_x_1d, geo_y_1d,
-                             coord_name_x='west_east', coord_name_y='south_north',
-                             dim_name_x='west_east', dim_name_y='south_north')
+                             coord_name_x=geo_x_tag, coord_name_y=geo_y_tag,
+                             dim_name_x=geo_x_tag, dim_name_y=geo_y_tag)
 
     return da_sm
 
 # -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to create the data buffers (reused by all the time steps of a chunk)
+def create_data_buffers(data_shape, file_type='grid_binary', file_reader='file', file_output='data_array',
+                        data_limit=None, data_prefetch=0, var_names=None):
+
+    if var_names is None:
+        var_names = ['SM']
+
+    data_buffers = {'file': None, 'data': {var_name: None for var_name in var_names}, 'mask': None,
+                    'geo_flip': None}
+    if (file_reader == 'memory') and (file_type == 'grid_binary'):
+        # one file buffer for each prefetched time step plus the one in use
+        if data_limit is None:
+            data_limit = data_shape[0] * data_shape[1]
+        data_buffers['file'] = [bytearray(data_limit * np.dtype('<i4').itemsize) for _ in range(data_prefetch + 1)]
+    if file_output == 'array':
+        # one data buffer for each variable (the mask buffer is shared by the variables)
+        data_buffers['data'] = {var_name: np.empty(data_shape, dtype=np.float32) for var_name in var_names}
+        data_buffers['mask'] = np.empty(data_shape, dtype=bool)
+
+    return data_buffers
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to load data grid (check, read the cache or inflate in memory or unzip to disk; i/o and zlib release the gil)
+def load_data_grid(file_name, file_buffer=None, cache_folder=None, cache_tags=None, file_check=True,
+                   file_extension_unzip='bin'):
+
+    # file availability could be previously checked by the source inventory
+    if file_check and (not os.path.exists(file_name)):
+        return None, None, None, None
+
+    # decoded grids previously saved in the cache (the decompression is skipped only if all the variables are cached)
+    cache_files, cache_grids = None, None
+    if cache_folder is not None:
+        cache_files = [define_cache_file(file_name, cache_folder, cache_tag=cache_tag) for cache_tag in cache_tags]
+        cache_grids = []
+        for cache_file in cache_files:
+            cache_grid = read_cache_grid(cache_file) if os.path.exists(cache_file) else None
+            if cache_grid is None:
+                cache_grids = None
+                break
+            cache_grids.append(cache_grid)
+        if cache_grids is not None:
+            return file_name, None, cache_files, cache_grids
+
+    if file_buffer is not None:
+        file_tmp = file_name
+        file_buffer = load_file_binary_buffer(file_name, file_buffer)
+    elif file_name.endswith(zip_extension):
+        file_tmp = change_extension(file_name, file_extension_unzip)
+        unzip_filename(file_name, file_tmp)
+    else:
+        file_tmp = file_name
+
+    return file_tmp, file_buffer, cache_files, cache_grids
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to get data grid(s) (according to the source type; one grid for each variable)
+def get_data_grid(file_name, data_static, data_settings, data_buffers, file_buffer=None,
+                  cache_files=None, cache_grids=None):
+
+    file_type = data_settings['file_type']
+    var_list = data_settings['variables']
+
+    if cache_files is None:
+        cache_files = [None] * var_list.__len__()
+
+    sm_grids = {}
+    if file_type == 'grid_binary':
+
+        # binary files are defined by one variable only
+        var_obj = var_list[0]
+        sm_grids[var_obj['var_name']] = get_data_binary(
+            file_name, da_geo=data_static['terrain'],
+            da_cn=data_static['cn'], da_cnet=data_static['channels_network'], mask_cnet=False,
+            value_sm_min=var_obj['var_min'], value_sm_max=var_obj['var_max'],
+            var_sm_scale_factor=var_obj['var_scale_factor'],
+            file_buffer=file_buffer, data_limit=data_settings['data_limit'],
+            da_vmax=data_static['vmax'], mask_nodata=data_static['mask_nodata'],
+            data_buffer=data_buffers['data'][var_obj['var_name']], mask_buffer=data_buffers['mask'],
+            output_format=data_settings['file_output'], file_loaded=file_buffer is not None,
+            cache_grid=None if cache_grids is None else cache_grids[0], cache_file=cache_files[0])
+
+    elif file_type == 'grid_nc':
+
+        # flip decision is computed once for each chunk (the source files share the same orientation)
+        if (data_buffers['geo_flip'] is None) and (cache_grids is None):
+            data_buffers['geo_flip'] = read_file_nc_flip(
+                file_name, geo_y_north_up=is_geo_north_up(data_static['terrain']))
+
+        # read all the variables in a single pass over the file
+        data_values = {}
+        if cache_grids is None:
+            window_y, window_x = (None, None)
+            if data_settings.get('data_window', None) is not None:
+                window_y, window_x = data_settings['data_window']
+            data_values = read_file_nc_vars(
+                file_name, var_list=[var_obj['var_name'] for var_obj in var_list],
+                window_y=window_y, window_x=window_x, geo_flip=data_buffers['geo_flip'],
+                data_grids=data_buffers['data'])
+
+        for var_id, var_obj in enumerate(var_list):
+            sm_grids[var_obj['var_name']] = get_data_nc(
+                file_name, da_geo=data_static['terrain'],
+                da_cn=data_static['cn'], da_cnet=data_static['channels_network'], mask_cnet=False,
+                value_sm_min=var_obj['var_min'], value_sm_max=var_obj['var_max'],
+                var_sm_scale_factor=var_obj['var_scale_factor'],
+                data_window=data_settings.get('data_window', None), geo_flip=data_buffers['geo_flip'],
+                data_buffer=data_buffers['data'][var_obj['var_name']], mask_buffer=data_buffers['mask'],
+                output_format=data_settings['file_output'],
+                cache_grid=None if cache_grids is None else cache_grids[var_id], cache_file=cache_files[var_id],
+                var_name=var_obj['var_name'], data_values=data_values.get(var_obj['var_name'], None))
+
+    else:
+        log_stream.error(' ===> Source data type "' + file_type + '" is not supported.')
+        raise NotImplementedError('Only "grid_binary" or "grid_nc" types are available.')
+
+    return sm_grids
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to iterate over the data grids of a chunk of time steps (grids are None if the file is not available)
+def iterate_data_grid(time_chunk, file_chunk, data_static, data_settings):
+
+    var_names = [var_obj['var_name'] for var_obj in data_settings['variables']]
+
+    data_prefetch = data_settings.get('data_prefetch', 0)
+    data_buffers = create_data_buffers(
+        data_static['terrain'].shape, file_type=data_settings['file_type'],
+        file_reader=data_settings['file_reader'], file_output=data_settings['file_output'],
+        data_limit=data_settings['data_limit'], data_prefetch=data_prefetch, var_names=var_names)
+
+    # define the cache tags (the decoded grid depends on the source type, the variable, the decoded cells and the
+    # no data mask)
+    cache_folder, cache_tags, cache_budget = data_settings.get('cache_folder', None), None, None
+    if cache_folder is not None:
+        cache_tags = [define_cache_tag(data_settings['file_type'], var_name, data_settings['data_limit'],
+                                       data_settings.get('data_window', None), data_static['mask_nodata'])
+                      for var_name in var_names]
+        cache_budget = create_cache_budget(cache_folder, data_settings.get('cache_size_max', None))
+
+    # load the next time steps in the prefetch threads (each step uses the file buffers in turn)
+    load_args = []
+    for file_id, file_step in enumerate(file_chunk):
+        file_buffer = None
+        if data_buffers['file'] is not None:
+            file_buffer = data_buffers['file'][file_id % data_buffers['file'].__len__()]
+        load_args.append((file_step, file_buffer, cache_folder, cache_tags, data_settings.get('file_check', True)))
+    load_iterator = run_thread_prefetch(load_data_grid, load_args, prefetch_size=data_prefetch)
+
+    for time_step, file_step, (file_tmp, file_buffer, cache_files, cache_grids) in zip(
+            time_chunk, file_chunk, load_iterator):
+
+        log_stream.info(' ------> Time "' + str(time_step) + '" ... ')
+
+        if file_tmp is not None:
+
+            # Get data grid(s) (the array output is reused by the next time step)
+            sm_grids = get_data_grid(file_tmp, data_static, data_settings, data_buffers, file_buffer=file_buffer,
+                                     cache_files=cache_files, cache_grids=cache_grids)
+
+            # Evict the least recently used cache files when the written grids are over the byte budget
+            if (cache_budget is not None) and (cache_grids is None):
+                cache_budget = update_cache_budget(cache_budget, cache_files)
+
+            yield time_step, sm_grids
+
+            log_stream.info(' ------> Time "' + str(time_step) + '" ... DONE')
+
+        else:
+
+            yield time_step, None
+
+            log_stream.info(' ------> Time "' + str(time_step) + '" ... FAILED')
+            log_stream.warning(' ===> File: "' + file_step + '" does not exist')
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to compute the data points over a chunk of time steps (one point collection for each variable, one zone
+# collection for each label grid, the pixel statistics accumulator and the correlation accumulator)
+def compute_data_chunk(time_chunk, file_chunk, data_static, data_settings):
+
+    point_dframe_registry = data_static['stations_registry']
+    point_operator = data_static['stations_operator']
+    zone_collection_obj = data_static.get('zones', None)
+
+    if point_operator is not None:
+        point_names = point_operator['points']
+    else:
+        point_names = list(point_dframe_registry['point_name'].values)
+
+    point_collections = {var_obj['var_name']: create_data_collection(time_chunk, point_names)
+                         for var_obj in data_settings['variables']}
+
+    # zonal and pixel statistics are computed for the first variable (soil moisture)
+    var_name_primary = data_settings['variables'][0]['var_name']
+    zone_collections = {}
+    if zone_collection_obj is not None:
+        zone_collections = {zone_name: create_data_collection(time_chunk, define_data_zones_columns(zone_obj))
+                            for zone_name, zone_obj in zone_collection_obj.items()}
+
+    # pixel statistics accumulator (time steps previously accumulated are skipped)
+    stats_settings, stats_collection = data_settings.get('stats', None), None
+    if stats_settings is not None:
+        stats_collection = create_data_stats(data_static['terrain'].shape, stats_lut=stats_settings['lut'])
+
+    # correlation accumulator (point values synchronized to the time range; time steps previously accumulated are
+    # skipped)
+    corr_settings, corr_collection = data_settings.get('correlation', None), None
+    if corr_settings is not None:
+        corr_collection = create_data_corr(corr_settings['points'], corr_settings['index'])
+
+    for time_step, sm_grids in iterate_data_grid(time_chunk, file_chunk, data_static, data_settings):
+
+        if sm_grids is not None:
+
+            # Update data stats
+            if (stats_collection is not None) and (time_step not in stats_settings['time_exclude']):
+                stats_collection = update_data_stats(stats_collection, sm_grids[var_name_primary], time_step)
+
+            # Update data correlation
+            if (corr_collection is not None) and (time_step not in corr_settings['time_exclude']):
+                corr_collection = update_data_corr(
+                    corr_collection, sm_grids[var_name_primary],
+                    corr_settings['values'][corr_settings['time'].get_loc(time_step)], time_step)
+
+            # Get and fill data zones
+            for zone_name, zone_obj in zone_collections.items():
+                sm_zone_data = extract_data_grid2zone(sm_grids[var_name_primary], zone_collection_obj[zone_name])
+                zone_collections[zone_name] = fill_data_collection(
+                    time_step, sm_zone_data, zone_collections[zone_name])
+
+            for var_name, sm_grid in sm_grids.items():
+
+                # Get data points
+                if point_operator is not None:
+                    sm_point_data = extract_data_grid2point_by_operator(sm_grid, point_operator)
+                else:
+                    sm_point_data = extract_data_grid2point(
+                        sm_grid, point_dframe_registry,
+                        method_spatial_operation=data_settings['spatial_operation'],
+                        method_spatial_mask=data_settings['spatial_mask'])
+
+                # Fill data points
+                point_collections[var_name] = fill_data_collection(
+                    time_step, sm_point_data, point_collections[var_name])
+
+    if corr_collection is not None:
+        corr_collection = flush_data_corr(corr_collection)
+
+    return {'points': point_collections, 'zones': zone_collections, 'stats': stats_collection,
+            'correlation': corr_collection}
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to compute the data points over a chunk of time steps (process pool worker; the log records are collected
+# for each chunk)
+def compute_data_chunk_by_process(time_chunk, file_chunk):
+    return collect_process_logs(
+        compute_data_chunk, time_chunk, file_chunk, get_process_data('data_static'), get_process_data('data_settings'))
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to repack the data grids in the grid cube file (only the time steps not previously filled)
+def repack_data_cube(time_range, file_list, file_cube, data_static, data_settings, time_frequency='H',
+                     var_name='SM', chunk_time=168, chunk_space=32, compression_level=4):
+
+    da_terrain = data_static['terrain']
+
+    # grid cube is defined by the first variable of the settings
+    var_obj = data_settings['variables'][0]
+    var_attrs = {'var_min': var_obj['var_min'], 'var_max': var_obj['var_max'],
+                 'var_scale_factor': var_obj['var_scale_factor']}
+
+    if os.path.exists(file_cube):
+        file_handle = open_file_cube(file_cube, file_mode='a')
+        cube_start, cube_frequency, chunk_time, cube_range, cube_filled = get_file_cube_time(
+            file_handle, var_name=var_name)
+        if pd.Timedelta(pd.tseries.frequencies.to_offset(cube_frequency)) != \
+                pd.Timedelta(pd.tseries.frequencies.to_offset(time_frequency)):
+            file_handle.close()
+            log_stream.error(' ===> Grid cube frequency "' + cube_frequency +
+                             '" is not consistent with the time frequency "' + time_frequency + '"')
+            raise IOError('Grid cube must be rebuilt to change the time frequency')
+        log_stream.info(' -----> Grid cube "' + file_cube + '" ... OPENED [steps: ' + str(cube_range.__len__()) +
+                        ', filled: ' + str(int(cube_filled.sum())) + ']')
+    else:
+        folder_cube, _ = os.path.split(file_cube)
+        make_folder(folder_cube)
+        cube_start, cube_frequency = time_range[0], time_frequency
+        file_handle = create_file_cube(
+            file_cube, da_terrain['Longitude'].values, da_terrain['Latitude'].values,
+            time_start=cube_start, time_frequency=cube_frequency, var_name=var_name, var_attrs=var_attrs,
+            chunk_time=chunk_time, chunk_space=chunk_space, compression_level=compression_level)
+        cube_filled = np.zeros(0, dtype=bool)
+        log_stream.info(' -----> Grid cube "' + file_cube + '" ... CREATED')
+
+    cube_step = pd.Timedelta(pd.tseries.frequencies.to_offset(cube_frequency))
+
+    # position of the time steps in the cube (the cube time axis is regular and starts at the first repack)
+    time_idx = np.asarray((time_range - cube_start) / cube_step)
+    time_select = (time_idx >= 0) & (time_idx == np.floor(time_idx))
+    if not np.all(time_select):
+        log_stream.warning(' ===> ' + str(int(np.sum(~time_select))) + ' time steps are not on the grid cube '
+                           'time axis (before the cube start or off the cube frequency); steps are skipped')
+    time_idx = time_idx[time_select].astype(np.int64)
+    file_list = [file_step for file_step, file_flag in zip(file_list, time_select) if file_flag]
+    time_steps = time_range[time_select]
+
+    time_filled = np.zeros(time_idx.shape[0], dtype=bool)
+    time_in_cube = time_idx < cube_filled.shape[0]
+    time_filled[time_in_cube] = cube_filled[time_idx[time_in_cube]]
+
+    time_idx, time_steps = time_idx[~time_filled], time_steps[~time_filled]
+    file_list = [file_step for file_step, file_flag in zip(file_list, time_filled) if not file_flag]
+
+    log_stream.info(' -----> Repack ' + str(time_idx.shape[0]) + ' time steps in blocks of ' +
+                    str(chunk_time) + ' steps')
+
+    # extend the cube time axis (the steps without source datasets are kept as not filled)
+    cube_n = cube_filled.shape[0]
+    if time_idx.shape[0] > 0 and int(time_idx.max()) + 1 > cube_n:
+        cube_n = int(time_idx.max()) + 1
+        write_file_cube_time(file_handle, cube_filled.shape[0], pd.date_range(
+            start=cube_start + cube_filled.shape[0] * cube_step, end=cube_start + (cube_n - 1) * cube_step,
+            freq=cube_frequency))
+        cube_filled = np.concatenate([cube_filled, np.zeros(cube_n - cube_filled.shape[0], dtype=bool)])
+
+    # write the blocks aligned to the cube time chunks (each compressed chunk is written once)
+    for block_id in np.unique(time_idx // chunk_time):
+
+        block_select = (time_idx // chunk_time) == block_id
+        block_idx_start = int(block_id * chunk_time)
+        block_idx_end = min(block_idx_start + chunk_time, cube_n)
+
+        block_data = np.array(read_file_cube_block(file_handle, block_idx_start, block_idx_end, var_name=var_name),
+                              dtype=np.float32)
+        block_filled = cube_filled[block_idx_start:block_idx_end].copy()
+
+        block_pos = time_idx[block_select] - block_idx_start
+        block_files = [file_step for file_step, file_flag in zip(file_list, block_select) if file_flag]
+        for step_pos, (time_step, sm_grids) in zip(
+                block_pos, iterate_data_grid(time_steps[block_select], block_files, data_static, data_settings)):
+            if sm_grids is not None:
+                block_data[step_pos] = np.asarray(sm_grids[var_obj['var_name']])
+                block_filled[step_pos] = True
+
+        write_file_cube_block(file_handle, block_idx_start, block_data, block_filled, var_name=var_name)
+        cube_filled[block_idx_start:block_idx_end] = block_filled
+
+    file_handle.close()
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to compute the data points from the grid cube file (reading the cube by time chunks)
+def compute_data_cube(time_range, file_cube, data_static, data_settings, var_name='SM'):
+
+    point_operator = data_static['stations_operator']
+    if point_operator is None:
+        log_stream.error(' ===> Grid cube extraction needs the stations operator in the static datasets')
+        raise IOError('Stations operator must be defined to read the grid cube')
+
+    file_handle = open_file_cube(file_cube, file_mode='r')
+    cube_start, cube_frequency, chunk_time, cube_range, cube_filled = get_file_cube_time(
+        file_handle, var_name=var_name)
+
+    var_obj = data_settings['variables'][0]
+    var_attrs = file_handle.variables[var_name].ncattrs()
+    for attr_key in ['var_min', 'var_max', 'var_scale_factor']:
+        if attr_key in var_attrs:
+            attr_value = file_handle.variables[var_name].getncattr(attr_key)
+            if not np.isclose(attr_value, var_obj[attr_key]):
+                log_stream.warning(' ===> Grid cube attribute "' + attr_key + '" (' + str(attr_value) +
+                                   ') is not consistent with the algorithm settings (' +
+                                   str(var_obj[attr_key]) + ')')
+
+    window_y, window_x, window_operator = crop_data_operator(point_operator, data_static['terrain'].shape)
+
+    point_collection = create_data_collection(time_range, point_operator['points'])
+
+    time_idx = cube_range.get_indexer(time_range)
+    time_select = time_idx >= 0
+    time_select[time_select] = cube_filled[time_idx[time_select]]
+    log_stream.info(' -----> Grid cube time steps: ' + str(int(time_select.sum())) + ' of ' +
+                    str(time_range.__len__()) + ' available')
+
+    time_pos = np.flatnonzero(time_select)
+    for block_id in np.unique(time_idx[time_pos] // chunk_time):
+
+        block_pos = time_pos[(time_idx[time_pos] // chunk_time) == block_id]
+        block_idx = time_idx[block_pos]
+        block_idx_start, block_idx_end = int(block_idx.min()), int(block_idx.max()) + 1
+
+        log_stream.info(' ------> Block "' + str(cube_range[block_idx_start]) + '" :: "' +
+                        str(cube_range[block_idx_end - 1]) + '" ... ')
+        block_data = read_file_cube_block(file_handle, block_idx_start, block_idx_end, var_name=var_name,
+                                          window_y=window_y, window_x=window_x)
+        block_data = block_data[block_idx - block_idx_start]
+
+        point_values = extract_data_grid2point_by_operator(
+            block_data.reshape(block_data.shape[0], -1), window_operator)
+
+        point_collection['values'][block_pos, :] = point_values
+        point_collection['filled'][block_pos] = True
+        log_stream.info(' ------> Block "' + str(cube_range[block_idx_start]) + '" :: "' +
+                        str(cube_range[block_idx_end - 1]) + '" ... DONE')
+
+    file_handle.close()
+
+    return point_collection
+# -------------------------------------------------------------------------------------
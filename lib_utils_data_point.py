@@ -10,12 +10,21 @@ Version:       '1.0.0'
 #######################################################################################
 # Libraries
 import logging
+import os
+import re
+import glob
 import numpy as np
 import pandas as pd
 
 from copy import deepcopy
 
 from lib_data_io_mat import read_file_mat
+from lib_data_io_pickle import read_obj, write_obj
+from lib_utils_process import get_process_data, collect_process_logs
+from lib_utils_cache import define_cache_tag, define_cache_file, define_file_fingerprint, \
+    read_cache_mat, write_cache_mat
+from lib_utils_system import unzip_filename, change_extension, make_folder
+from lib_utils_time import decode_time_values
 from lib_info_args import logger_name
 
 # Logging
@@ -41,24 +50,97 @@ def join_data_series(series_sm, dframe_sm_in=None):
 
 
 # -------------------------------------------------------------------------------------
-# Method to concatenate series
-def concatenate_data_series(series_sm_step, series_sm_concat=None):
-    if series_sm_concat is None:
-        series_sm_concat = deepcopy(series_sm_step)
+# Method to merge the series of different periods (single concatenation, stable sort and duplicated times resolved)
+def merge_data_series(series_sm_list, duplicate_policy='last', var_name=None):
+
+    series_sm_list = [series_sm for series_sm in series_sm_list if series_sm is not None]
+    if not series_sm_list:
+        return None
+    if var_name is None:
+        var_name = series_sm_list[0].name
+
+    time_values = np.concatenate([series_sm.index.values.astype('datetime64[ns]').astype(np.int64)
+                                  for series_sm in series_sm_list])
+    data_values = np.concatenate([series_sm.values for series_sm in series_sm_list])
+
+    # stable sort (the duplicated times keep the order of the files)
+    time_order = np.argsort(time_values, kind='stable')
+    time_values, data_values = time_values[time_order], data_values[time_order]
+
+    time_first = np.ones(time_values.shape[0], dtype=bool)
+    time_first[1:] = time_values[1:] != time_values[:-1]
+    time_start_idx = np.flatnonzero(time_first)
+
+    if duplicate_policy == 'first':
+        data_values = data_values[time_start_idx]
+    elif duplicate_policy == 'last':
+        time_last_idx = np.append(time_start_idx[1:], time_values.shape[0]) - 1
+        data_values = data_values[time_last_idx]
+    elif duplicate_policy == 'mean':
+        data_values = data_values.astype(np.float64)
+        data_valid = np.isfinite(data_values)
+        data_sum = np.add.reduceat(np.where(data_valid, data_values, 0.0), time_start_idx)
+        data_count = np.add.reduceat(data_valid.astype(np.int64), time_start_idx)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            data_values = np.where(data_count > 0, data_sum / data_count, np.nan)
     else:
-        series_sm_concat = pd.concat([series_sm_concat, series_sm_step])
-    return series_sm_concat
+        log_stream.error(' ===> Duplicate policy "' + duplicate_policy + '" is not supported')
+        raise NotImplementedError('Case not implemented yet. Only "last", "first" and "mean" policies are available')
+
+    time_values = time_values[time_start_idx]
+
+    series_sm = pd.Series(data=data_values, index=pd.DatetimeIndex(time_values.view('datetime64[ns]')), name=var_name)
+
+    return series_sm
 # -------------------------------------------------------------------------------------
 
 
 # -------------------------------------------------------------------------------------
-# Method to get data matlab
-def get_data_mat(file_name, var_name='sm', var_value_min=0.0, var_value_max=100.0, var_scale_factor=1.0):
+# Method to synchronize a series to a time range (average of the values at t - window, t and t + window)
+def sync_data_series(series_sm, time_range, temporal_window='30min', temporal_operation='average'):
+
+    if temporal_operation != 'average':
+        log_stream.error(' ===> Temporal operation "' + temporal_operation + '" is not supported')
+        raise NotImplementedError('Case not implemented yet. Only "average" method is available')
+
+    time_range = pd.DatetimeIndex(time_range)
+    time_window = pd.Timedelta(temporal_window)
+
+    # sum and count of the valid values for each time (all the values of the duplicated times are used)
+    series_group = series_sm.astype(float).groupby(level=0)
+    series_sum, series_count = series_group.sum(), series_group.count()
 
-    file_obj = read_file_mat(file_name)
+    values_sum, values_count = np.zeros(time_range.shape[0]), np.zeros(time_range.shape[0])
+    for time_shift in [-1, 0, 1]:
+        time_window_range = time_range + time_shift * time_window
+        values_sum += series_sum.reindex(time_window_range, fill_value=0.0).values
+        values_count += series_count.reindex(time_window_range, fill_value=0).values
+
+    values_sync = np.full(time_range.shape[0], np.nan)
+    np.divide(values_sum, values_count, out=values_sync, where=values_count > 0)
+
+    return values_sync
+# -------------------------------------------------------------------------------------
 
-    file_datetime_idx = pd.DatetimeIndex(file_obj['a1sDateVet'])
-    file_values = file_obj['a1dVWC'].flatten()
+
+# -------------------------------------------------------------------------------------
+# Method to get data matlab (parsed times and values of the cache, if available; the parsed file is saved in the
+# cache file, if defined)
+def get_data_mat(file_name, var_name='sm', var_value_min=0.0, var_value_max=100.0, var_scale_factor=1.0,
+                 cache_file=None, file_cache=None):
+
+    if file_cache is not None:
+        file_datetime_idx = pd.DatetimeIndex(file_cache['time'].view('datetime64[ns]'))
+        file_values = file_cache['values'].astype(np.float64)
+    else:
+        file_obj = read_file_mat(file_name)
+
+        file_datetime_idx = decode_time_values(file_obj['a1sDateVet'])
+        file_values = file_obj['a1dVWC'].flatten()
+
+        # save the parsed times and values in the cache (before the limits)
+        if cache_file is not None:
+            write_cache_mat(cache_file, file_datetime_idx.asi8, file_values)
 
     file_values[file_values < float(var_value_min)] = np.nan
     file_values[file_values > float(var_value_max)] = np.nan
@@ -69,3 +151,313 @@ def get_data_mat(file_name, var_name='sm', var_value_min=0.0, var_value_max=100.
     return series_sm
 
 # -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to search the source files of a point (sorted by name)
+def search_data_files(file_path_undefined):
+
+    if '*' in file_path_undefined:
+        file_path_list = glob.glob(file_path_undefined)
+        file_path_list = sorted(file_path_list)
+    else:
+        file_path_list = deepcopy(file_path_undefined)
+
+    if isinstance(file_path_list, str):
+        file_path_list = [file_path_list]
+
+    return file_path_list
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to search the time period of the source files (defined in the file name)
+def search_data_period(file_path_list):
+
+    file_time_start, file_time_end = [], []
+    for file_id, file_path_step in enumerate(file_path_list):
+
+        file_time_tmp = re.search(r'\d{12}_\d{12}', file_path_step)
+        file_time_str_start, file_time_str_end = file_time_tmp.group().split('_')
+
+        file_time_str_start = str(pd.Timestamp(file_time_str_start))
+        file_time_str_end = str(pd.Timestamp(file_time_str_end))
+
+        file_time_start.append(file_time_str_start)
+        file_time_end.append(file_time_str_end)
+
+    return file_time_start, file_time_end
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to get the series of a point period file (parsed cache, unzip and reader of the file type)
+def get_data_point(point_name, file_src_step, time_start_step, time_end_step, data_settings):
+
+    file_type_src = data_settings['file_type']
+    cache_folder = data_settings.get('cache_folder', None)
+
+    log_stream.info(' --------> Time "' + str(time_start_step) + '" - "'
+                    + str(time_end_step) + '"... ')
+
+    sm_point_base = None
+    if os.path.exists(file_src_step):
+
+        # cache file keyed by the source file (path, modification time and size); the source file is unzipped only
+        # if the cache file is not available
+        cache_file, file_cache = None, None
+        if cache_folder is not None:
+            cache_file = define_cache_file(file_src_step, cache_folder, cache_tag=file_type_src, cache_ext='.npy')
+            file_cache = read_cache_mat(cache_file)
+
+        if file_cache is not None:
+            file_tmp_step = file_src_step
+        elif file_src_step.endswith(data_settings['file_extension_zip']):
+            file_tmp_step = change_extension(file_src_step, data_settings['file_extension_unzip'])
+            unzip_filename(file_src_step, file_tmp_step)
+        else:
+            file_tmp_step = file_src_step
+
+        if file_type_src == 'point_mat':
+
+            sm_point_base = get_data_mat(
+                file_tmp_step, var_name=point_name,
+                var_value_min=data_settings['var_min'], var_value_max=data_settings['var_max'],
+                var_scale_factor=data_settings['var_scale_factor'], cache_file=cache_file, file_cache=file_cache)
+
+        else:
+            log_stream.error(' ===> Source data type "' + file_type_src + '" is not supported.')
+            raise NotImplementedError('Only "point_mat" type is available.')
+
+        log_stream.info(' --------> Time "' + str(time_start_step) + '" - "'
+                        + str(time_end_step) + '"... DONE')
+
+    else:
+        log_stream.info(' --------> Time "' + str(time_start_step) + '" - "'
+                        + str(time_end_step) + '"... FAILED')
+        log_stream.warning(' ===> File: "' + file_src_step + '" does not exist')
+
+    return sm_point_base
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to define the manifest tag (settings that change the point series)
+def define_data_manifest_tag(data_settings):
+    return define_cache_tag(
+        data_settings['file_type'], data_settings['var_min'], data_settings['var_max'],
+        data_settings['var_scale_factor'], data_settings.get('duplicate_policy', 'last'))
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to search the changed files in the manifest (new or modified files; periods of the modified or removed files
+# and extension of the time window)
+def search_data_manifest(file_path_list, file_fingerprint_list, manifest_obj, manifest_tag, time_window=None):
+
+    if (manifest_obj is None) or (manifest_obj.get('tag', None) != manifest_tag):
+        return None, None
+
+    # the previous series is trimmed by the previous time window (extended to the past only by reading all the files)
+    manifest_window = manifest_obj.get('time_window', None)
+    if (manifest_window is not None) and ((time_window is None) or (time_window[0] < manifest_window[0])):
+        return None, None
+
+    manifest_files = manifest_obj['files']
+
+    file_changed, time_region = [], []
+    if (manifest_window is not None) and (time_window[1] > manifest_window[1]):
+        time_region.append((manifest_window[1], time_window[1]))
+    for file_path_step, file_fingerprint_step in zip(file_path_list, file_fingerprint_list):
+        manifest_step = manifest_files.get(file_path_step, None)
+        if (manifest_step is None) or (manifest_step['fingerprint'] != file_fingerprint_step):
+            file_changed.append(True)
+            if manifest_step is not None:
+                time_region.append(manifest_step['time_period'])
+        else:
+            file_changed.append(False)
+
+    for file_path_step, manifest_step in manifest_files.items():
+        if file_path_step not in file_path_list:
+            time_region.append(manifest_step['time_period'])
+
+    time_region = [time_period for time_period in time_region if time_period is not None]
+
+    return file_changed, time_region
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to select the times of a series within the time region (list of periods)
+def select_data_region(series_sm, time_region):
+    time_select = np.zeros(series_sm.shape[0], dtype=bool)
+    for time_start_region, time_end_region in time_region:
+        time_select |= (series_sm.index >= time_start_region) & (series_sm.index <= time_end_region)
+    return time_select
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to check the time window of the ancillary file (series saved without a window cover any window)
+def check_data_window(file_path_anc, time_window):
+
+    if not os.path.exists(file_path_anc):
+        return False
+
+    series_window = read_obj(file_path_anc).attrs.get('time_window', None)
+    if series_window is None:
+        return True
+    if time_window is None:
+        return False
+
+    return (series_window[0] <= time_window[0]) and (series_window[1] >= time_window[1])
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to compute the series of a point (all the period files) and to save it in the ancillary file
+def compute_data_point(point_name, file_path_src, file_path_anc, data_settings, file_path_manifest=None):
+
+    log_stream.info(' -----> Point "' + point_name + '" ... ')
+
+    file_path_list_src = search_data_files(file_path_src)
+    file_time_start_src, file_time_end_src = search_data_period(file_path_list_src)
+
+    # Select the files with a period overlapping the time window (the other files are not opened)
+    time_window = data_settings.get('time_window', None)
+    if time_window is not None:
+        file_path_n = file_path_list_src.__len__()
+        file_select = [(pd.Timestamp(time_start_step) <= time_window[1]) and
+                       (pd.Timestamp(time_end_step) >= time_window[0])
+                       for time_start_step, time_end_step in zip(file_time_start_src, file_time_end_src)]
+        file_path_list_src = [file_step for file_step, file_flag in zip(file_path_list_src, file_select) if file_flag]
+        file_time_start_src = [time_step for time_step, file_flag in zip(file_time_start_src, file_select) if file_flag]
+        file_time_end_src = [time_step for time_step, file_flag in zip(file_time_end_src, file_select) if file_flag]
+
+        log_stream.info(' ------> Time window "' + str(time_window[0]) + '" - "' + str(time_window[1]) + '" [files: ' +
+                        str(file_path_list_src.__len__()) + ' of ' + str(file_path_n) + ']')
+
+    # Search the files to read with the manifest of the ingested files (incremental mode; all the files otherwise)
+    file_fingerprint_list = [define_file_fingerprint(file_step) if os.path.exists(file_step) else None
+                             for file_step in file_path_list_src]
+    manifest_tag, manifest_obj = None, None
+    file_changed, time_region, sm_point_archive = None, None, None
+    if file_path_manifest is not None:
+        manifest_tag = define_data_manifest_tag(data_settings)
+        if os.path.exists(file_path_anc):
+            manifest_obj = read_obj(file_path_manifest)
+            file_changed, time_region = search_data_manifest(
+                file_path_list_src, file_fingerprint_list, manifest_obj, manifest_tag, time_window=time_window)
+            if file_changed is not None:
+                sm_point_archive = read_obj(file_path_anc)
+
+        if sm_point_archive is None:
+            file_changed, time_region = None, None
+            log_stream.info(' ------> Incremental mode: manifest not available or defined by different settings or '
+                            'time window')
+        else:
+            log_stream.info(' ------> Incremental mode: ' + str(sum(file_changed)) + ' of ' +
+                            str(file_path_list_src.__len__()) + ' files new or modified')
+
+            if (not any(file_changed)) and (not time_region) and (manifest_obj.get('time_window', None) == time_window):
+                log_stream.info(' -----> Point "' + point_name + '" ... SKIPPED. Files previously ingested')
+                return point_name
+
+    if file_changed is None:
+        file_changed = [True] * file_path_list_src.__len__()
+
+    log_stream.info(' ------> Get datasets ... ')
+
+    # Get the new or modified files (all the files if the incremental mode is not available)
+    sm_point_dict, file_period_dict = {}, {}
+    for file_id, (time_start_step, time_end_step, file_src_step) in enumerate(zip(
+            file_time_start_src, file_time_end_src, file_path_list_src)):
+        if file_changed[file_id]:
+            sm_point_dict[file_id] = get_data_point(
+                point_name, file_src_step, time_start_step, time_end_step, data_settings)
+
+    for file_id, sm_point_base in sm_point_dict.items():
+        file_period_dict[file_id] = None
+        if (sm_point_base is not None) and (sm_point_base.shape[0] > 0):
+            file_period_dict[file_id] = (sm_point_base.index.min(), sm_point_base.index.max())
+            if sm_point_archive is not None:
+                time_region.append(file_period_dict[file_id])
+
+    # Get the previously ingested files overlapping the changed periods (all the values of these times are merged)
+    if sm_point_archive is not None:
+        for file_id, (time_start_step, time_end_step, file_src_step) in enumerate(zip(
+                file_time_start_src, file_time_end_src, file_path_list_src)):
+            if not file_changed[file_id]:
+                file_period_step = manifest_obj['files'][file_src_step]['time_period']
+                file_period_dict[file_id] = file_period_step
+                if (file_period_step is not None) and any(
+                        (file_period_step[0] <= time_end_region) and (file_period_step[1] >= time_start_region)
+                        for time_start_region, time_end_region in time_region):
+                    sm_point_dict[file_id] = get_data_point(
+                        point_name, file_src_step, time_start_step, time_end_step, data_settings)
+
+    # Merge series of different period (monotonic index; duplicated times resolved by the policy)
+    sm_point_series = merge_data_series(
+        [sm_point_dict[file_id] for file_id in sorted(sm_point_dict.keys())],
+        duplicate_policy=data_settings.get('duplicate_policy', 'last'), var_name=point_name)
+
+    # Replace the changed periods of the previous series (incremental mode)
+    if sm_point_archive is not None:
+        sm_point_archive = sm_point_archive[~select_data_region(sm_point_archive, time_region)]
+        if sm_point_series is not None:
+            sm_point_series = sm_point_series[select_data_region(sm_point_series, time_region)]
+            sm_point_series = pd.concat([sm_point_archive, sm_point_series]).sort_index()
+            sm_point_series.name = point_name
+        else:
+            sm_point_series = sm_point_archive
+
+    # Trim the series of the files partially overlapping the time window
+    if (time_window is not None) and (sm_point_series is not None):
+        sm_point_series = sm_point_series[(sm_point_series.index >= time_window[0]) &
+                                          (sm_point_series.index <= time_window[1])]
+
+    log_stream.info(' ------> Get datasets ... DONE')
+
+    # Save point time series
+    log_stream.info(' ------> Save datasets ... ')
+    if sm_point_series is not None:
+        folder_name_anc, file_name_anc = os.path.split(file_path_anc)
+        make_folder(folder_name_anc)
+
+        # the time window is saved with the series (the series is computed again for a window not covered)
+        sm_point_series.attrs['time_window'] = time_window
+        write_obj(file_path_anc, sm_point_series)
+
+        log_stream.info(' ------> Save datasets ... DONE')
+
+    else:
+        log_stream.info(' ------> Save datasets ... FAILED')
+        log_stream.error(' ===> Datasets are defined by NoneType')
+        raise IOError('Datasets must be defined to correctly run the algorithm')
+
+    # Save the manifest of the ingested files (fingerprints and periods of the parsed values)
+    if file_path_manifest is not None:
+        manifest_files = {}
+        for file_id, (file_src_step, file_fingerprint_step) in enumerate(zip(
+                file_path_list_src, file_fingerprint_list)):
+            if (file_fingerprint_step is not None) and (file_id in file_period_dict):
+                manifest_files[file_src_step] = {
+                    'fingerprint': file_fingerprint_step, 'time_period': file_period_dict[file_id]}
+
+        folder_name_manifest, file_name_manifest = os.path.split(file_path_manifest)
+        make_folder(folder_name_manifest)
+        write_obj(file_path_manifest, {'tag': manifest_tag, 'time_window': time_window, 'files': manifest_files})
+
+    log_stream.info(' -----> Point "' + point_name + '" ... DONE')
+
+    return point_name
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to compute the series of a point (process pool worker; the log records are collected for each point)
+def compute_data_point_by_process(point_name, file_path_src, file_path_anc, file_path_manifest=None):
+    return collect_process_logs(
+        compute_data_point, point_name, file_path_src, file_path_anc, get_process_data('data_settings'),
+        file_path_manifest)
+# -------------------------------------------------------------------------------------
@@ -12,6 +12,8 @@ import logging
 import pyresample
 import numpy as np
 
+from scipy.spatial import cKDTree
+
 from lib_info_args import logger_name
 
 # Logging
@@ -89,6 +91,50 @@ def get_grid_idx_from_xy(geo_point_x, geo_point_y, geo_grid_x, geo_grid_y,
 # -------------------------------------------------------------------------------------
 
 
+# -------------------------------------------------------------------------------------
+# Method to convert geographical coordinates to cartesian coordinates (spherical earth)
+def convert_lonlat2xyz(geo_x, geo_y, geo_radius_earth=6370997.0):
+
+    geo_lon, geo_lat = np.deg2rad(np.asarray(geo_x, dtype=float)), np.deg2rad(np.asarray(geo_y, dtype=float))
+
+    geo_xyz = np.stack([geo_radius_earth * np.cos(geo_lat) * np.cos(geo_lon),
+                        geo_radius_earth * np.cos(geo_lat) * np.sin(geo_lon),
+                        geo_radius_earth * np.sin(geo_lat)], axis=-1)
+
+    return geo_xyz
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to get indexes and distances of the grid cells within the radius of influence (all the points in a single
+# kd-tree query)
+def get_grid_idx_by_radius(geo_points_x, geo_points_y, geo_grid_x, geo_grid_y,
+                           geo_radius_influence=50000, geo_radius_earth=6370997.0):
+
+    geo_grid_xyz = convert_lonlat2xyz(geo_grid_x.ravel(), geo_grid_y.ravel(), geo_radius_earth=geo_radius_earth)
+    geo_points_xyz = convert_lonlat2xyz(geo_points_x, geo_points_y, geo_radius_earth=geo_radius_earth)
+
+    # chord length of the radius of influence (great circle distance)
+    geo_radius_chord = 2.0 * geo_radius_earth * np.sin(
+        min(geo_radius_influence / (2.0 * geo_radius_earth), np.pi / 2.0))
+
+    geo_tree = cKDTree(geo_grid_xyz)
+    geo_points_idx = geo_tree.query_ball_point(geo_points_xyz, r=geo_radius_chord)
+
+    geo_idx_list, geo_distance_list = [], []
+    for geo_point_xyz, geo_point_idx in zip(geo_points_xyz, geo_points_idx):
+        geo_point_idx = np.sort(np.array(geo_point_idx, dtype=int))
+        geo_point_chord = np.linalg.norm(geo_grid_xyz[geo_point_idx] - geo_point_xyz, axis=1)
+        geo_point_distance = 2.0 * geo_radius_earth * np.arcsin(
+            np.clip(geo_point_chord / (2.0 * geo_radius_earth), 0.0, 1.0))
+
+        geo_idx_list.append(geo_point_idx)
+        geo_distance_list.append(geo_point_distance)
+
+    return geo_idx_list, geo_distance_list
+# -------------------------------------------------------------------------------------
+
+
 # ------------------------------------------------------------------------------------
 # Method to convert curve number to s (vmax)
 def convert_cn2s(data_cn, data_terrain):
@@ -0,0 +1,92 @@
+"""
+Library Features:
+
+Name:          lib_utils_inventory
+Author(s):     Fabio Delogu (fabio.delogu@cimafoundation.org)
+Date:          '20221125'
+Version:       '1.0.0'
+"""
+
+# -------------------------------------------------------------------------------------
+# Libraries
+import logging
+import os
+import numpy as np
+import pandas as pd
+
+from lib_info_args import logger_name
+
+# Logging
+log_stream = logging.getLogger(logger_name)
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to scan a folder (file names and folder modification time)
+def scan_file_folder(folder_name):
+
+    try:
+        folder_mtime = os.stat(folder_name).st_mtime_ns
+    except FileNotFoundError:
+        return None, set()
+
+    file_names = set()
+    with os.scandir(folder_name) as folder_iterator:
+        for folder_entry in folder_iterator:
+            if folder_entry.is_file():
+                file_names.add(folder_entry.name)
+
+    return folder_mtime, file_names
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to update the file inventory (only the folders changed since the previous scan are scanned again)
+def update_file_inventory(file_list, file_inventory=None):
+
+    if file_inventory is None:
+        file_inventory = {}
+
+    folder_list = [os.path.split(file_path) for file_path in file_list]
+
+    folder_scanned = 0
+    for folder_name in set([folder_step for folder_step, _ in folder_list]):
+
+        try:
+            folder_mtime = os.stat(folder_name).st_mtime_ns
+        except FileNotFoundError:
+            folder_mtime = None
+
+        folder_inventory = file_inventory.get(folder_name, None)
+        if (folder_inventory is None) or (folder_inventory['mtime'] != folder_mtime):
+            folder_mtime, file_names = scan_file_folder(folder_name)
+            file_inventory[folder_name] = {'mtime': folder_mtime, 'files': file_names}
+            folder_scanned += 1
+
+    file_flags = np.array([file_name in file_inventory[folder_name]['files']
+                           for folder_name, file_name in folder_list], dtype=bool)
+
+    return file_flags, file_inventory, folder_scanned
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to summarize the gaps of the file inventory (contiguous periods of missing files)
+def summarize_file_gaps(time_range, file_flags, gaps_max=10):
+
+    time_range = pd.DatetimeIndex(time_range)
+    file_missing = np.concatenate([[False], ~file_flags, [False]])
+    gap_bounds = np.flatnonzero(np.diff(file_missing.astype(np.int8)))
+    gap_start, gap_end = gap_bounds[0::2], gap_bounds[1::2] - 1
+
+    gap_list = []
+    for gap_idx_start, gap_idx_end in zip(gap_start, gap_end):
+        gap_list.append('"' + str(time_range[gap_idx_start]) + '" :: "' + str(time_range[gap_idx_end]) +
+                        '" [' + str(gap_idx_end - gap_idx_start + 1) + ' steps]')
+
+    gap_summary = ', '.join(gap_list[:gaps_max])
+    if gap_list.__len__() > gaps_max:
+        gap_summary += ', ... (' + str(gap_list.__len__() - gaps_max) + ' more periods)'
+
+    return gap_list.__len__(), gap_summary
+# -------------------------------------------------------------------------------------
@@ -0,0 +1,172 @@
+"""
+Library Features:
+
+Name:          lib_utils_process
+Author(s):     Fabio Delogu (fabio.delogu@cimafoundation.org)
+Date:          '20221125'
+Version:       '1.0.0'
+"""
+
+# -------------------------------------------------------------------------------------
+# Libraries
+import logging
+import os
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from lib_info_args import logger_name
+
+# Logging
+log_stream = logging.getLogger(logger_name)
+
+# Data shared by the worker(s) of the process pool (set once by the pool initializer)
+process_data = {}
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to define the process settings
+def define_process_settings(alg_dict, process_mode_default='serial', process_workers_default=1,
+                            process_chunk_default=720, process_prefetch_default=0):
+
+    process_mode = alg_dict.get('process_mode', process_mode_default)
+    process_workers = alg_dict.get('process_workers', process_workers_default)
+    process_chunk = alg_dict.get('process_chunk', process_chunk_default)
+    process_prefetch = alg_dict.get('process_prefetch', process_prefetch_default)
+
+    if process_mode not in ['serial', 'pool']:
+        log_stream.error(' ===> Process mode "' + str(process_mode) + '" is not supported')
+        raise NotImplementedError('Only "serial" or "pool" modes are available.')
+
+    if (process_workers is None) or (process_workers <= 0):
+        process_workers = os.cpu_count()
+    if (process_chunk is None) or (process_chunk <= 0):
+        process_chunk = process_chunk_default
+    if (process_prefetch is None) or (process_prefetch < 0):
+        process_prefetch = process_prefetch_default
+
+    if process_mode == 'pool' and process_workers == 1:
+        process_mode = 'serial'
+
+    return process_mode, int(process_workers), int(process_chunk), int(process_prefetch)
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to split the time range (and the related file list) in chunks
+def split_process_chunks(time_range, file_list, process_chunk=720):
+
+    chunk_list = []
+    for chunk_start in range(0, time_range.__len__(), process_chunk):
+        chunk_end = chunk_start + process_chunk
+        chunk_list.append((time_range[chunk_start:chunk_end], file_list[chunk_start:chunk_end]))
+
+    return chunk_list
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to set the data shared by the worker(s)
+def set_process_data(process_data_shared):
+    process_data.update(process_data_shared)
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to get the data shared by the worker(s)
+def get_process_data(data_key):
+    return process_data[data_key]
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Class to collect the log records of a worker (emitted by the main process in the order of the results)
+class ProcessLogCollector(logging.Handler):
+
+    def __init__(self):
+        super().__init__(level=logging.DEBUG)
+        self.records = []
+
+    def emit(self, record):
+        # format the message and the exception (the records must be picklable)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        self.records.append(record)
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to run a function collecting its log records (the exception, if any, is returned with the records)
+def collect_process_logs(process_func, *process_args):
+
+    log_collector = ProcessLogCollector()
+    log_handlers, log_propagate = log_stream.handlers[:], log_stream.propagate
+
+    log_stream.handlers, log_stream.propagate = [log_collector], False
+    process_result, process_error = None, None
+    try:
+        process_result = process_func(*process_args)
+    except Exception as process_exception:
+        process_error = process_exception
+    finally:
+        log_stream.handlers, log_stream.propagate = log_handlers, log_propagate
+
+    return process_result, log_collector.records, process_error
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to emit the log records collected by a worker (the exception, if any, is raised after the records)
+def emit_process_logs(process_records, process_error=None):
+
+    for process_record in process_records:
+        log_stream.handle(process_record)
+
+    if process_error is not None:
+        raise process_error
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to run a function over a process pool (results are yielded in the order of the arguments)
+def run_process_pool(process_func, process_args, process_workers=1, process_data_shared=None):
+
+    if process_data_shared is None:
+        process_data_shared = {}
+
+    with ProcessPoolExecutor(max_workers=process_workers,
+                             initializer=set_process_data, initargs=(process_data_shared,)) as process_pool:
+        for process_result in process_pool.map(process_func, *zip(*process_args)):
+            yield process_result
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to run a function over a thread pool ahead of the caller (results are yielded in the order of the
+# arguments; at most "prefetch_size" calls are pending while the caller works on the current result)
+def run_thread_prefetch(prefetch_func, prefetch_args, prefetch_size=2):
+
+    if prefetch_size <= 0:
+        for prefetch_arg in prefetch_args:
+            yield prefetch_func(*prefetch_arg)
+        return
+
+    prefetch_iterator = iter(prefetch_args)
+    with ThreadPoolExecutor(max_workers=prefetch_size) as prefetch_pool:
+
+        prefetch_queue = deque()
+        for prefetch_arg in prefetch_iterator:
+            prefetch_queue.append(prefetch_pool.submit(prefetch_func, *prefetch_arg))
+            if prefetch_queue.__len__() == prefetch_size:
+                break
+
+        while prefetch_queue:
+            prefetch_result = prefetch_queue.popleft().result()
+            prefetch_arg = next(prefetch_iterator, None)
+            if prefetch_arg is not None:
+                prefetch_queue.append(prefetch_pool.submit(prefetch_func, *prefetch_arg))
+            yield prefetch_result
+# -------------------------------------------------------------------------------------
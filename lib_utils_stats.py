@@ -0,0 +1,260 @@
+"""
+Library Features:
+
+Name:          lib_utils_stats
+Author(s):     Fabio Delogu (fabio.delogu@cimafoundation.org)
+Date:          '20221125'
+Version:       '1.0.0'
+"""
+
+# -------------------------------------------------------------------------------------
+# Libraries
+import logging
+import numpy as np
+import pandas as pd
+
+from lib_info_args import logger_name
+
+# Logging
+log_stream = logging.getLogger(logger_name)
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to create the statistics accumulator (per pixel count, mean, m2, min and max for each group)
+def create_data_stats(data_shape, stats_lut=None, stats_group_all='ALL'):
+
+    stats_groups = [stats_group_all]
+    if stats_lut is not None:
+        for stats_group in stats_lut.values():
+            if stats_group not in stats_groups:
+                stats_groups.append(stats_group)
+
+    stats_shape = (stats_groups.__len__(), data_shape[0], data_shape[1])
+    data_stats = {
+        'groups': stats_groups, 'lut': stats_lut, 'time': [],
+        'count': np.zeros(stats_shape, dtype=np.int64),
+        'mean': np.zeros(stats_shape, dtype=np.float64), 'm2': np.zeros(stats_shape, dtype=np.float64),
+        'min': np.full(stats_shape, np.inf, dtype=np.float64), 'max': np.full(stats_shape, -np.inf, dtype=np.float64)}
+
+    return data_stats
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to update the statistics accumulator with a grid (welford update of the valid pixels)
+def update_data_stats(data_stats, data_grid, time_step):
+
+    if isinstance(data_grid, np.ndarray):
+        values = data_grid
+    else:
+        values = data_grid.values
+    values = np.asarray(values, dtype=np.float64)
+
+    values_valid = np.isfinite(values)
+    values_select = values[values_valid]
+
+    group_idx_list = [0]
+    if data_stats['lut'] is not None:
+        group_idx_list.append(data_stats['groups'].index(data_stats['lut'][pd.Timestamp(time_step).month]))
+
+    for group_idx in group_idx_list:
+
+        group_count = data_stats['count'][group_idx]
+        group_mean = data_stats['mean'][group_idx]
+        group_m2 = data_stats['m2'][group_idx]
+
+        group_count[values_valid] += 1
+        values_delta = values_select - group_mean[values_valid]
+        group_mean[values_valid] += values_delta / group_count[values_valid]
+        group_m2[values_valid] += values_delta * (values_select - group_mean[values_valid])
+
+        np.fmin(data_stats['min'][group_idx], values, out=data_stats['min'][group_idx])
+        np.fmax(data_stats['max'][group_idx], values, out=data_stats['max'][group_idx])
+
+    data_stats['time'].append(pd.Timestamp(time_step))
+
+    return data_stats
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to merge two statistics accumulators (chan parallel merge; the accumulators cover different time steps)
+def merge_data_stats(data_stats, data_stats_other):
+
+    if data_stats is None:
+        return data_stats_other
+    if data_stats_other is None:
+        return data_stats
+
+    if data_stats['groups'] != data_stats_other['groups']:
+        log_stream.error(' ===> Statistics accumulators are defined by different groups')
+        raise IOError('Statistics accumulators must be defined by the same groups to be merged')
+
+    count_a, count_b = data_stats['count'], data_stats_other['count']
+    count_ab = count_a + count_b
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_delta = data_stats_other['mean'] - data_stats['mean']
+        weight_b = np.where(count_ab > 0, count_b / count_ab, 0.0)
+        data_stats['mean'] = data_stats['mean'] + mean_delta * weight_b
+        data_stats['m2'] = data_stats['m2'] + data_stats_other['m2'] + mean_delta * mean_delta * count_a * weight_b
+
+    data_stats['count'] = count_ab
+    data_stats['min'] = np.fmin(data_stats['min'], data_stats_other['min'])
+    data_stats['max'] = np.fmax(data_stats['max'], data_stats_other['max'])
+    data_stats['time'] = sorted(set(data_stats['time']) | set(data_stats_other['time']))
+
+    return data_stats
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to compute the statistics maps from the accumulator (population variance; nan where no valid values)
+def compute_data_stats_maps(data_stats):
+
+    data_count = data_stats['count']
+    data_empty = data_count == 0
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        data_variance = data_stats['m2'] / data_count
+
+    stats_maps = {
+        'mean': np.where(data_empty, np.nan, data_stats['mean']).astype(np.float32),
+        'variance': np.where(data_empty, np.nan, data_variance).astype(np.float32),
+        'min': np.where(data_empty, np.nan, data_stats['min']).astype(np.float32),
+        'max': np.where(data_empty, np.nan, data_stats['max']).astype(np.float32),
+        'count': data_count.astype(np.int32)}
+
+    return stats_maps
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to create the correlation accumulator (cross moments of the grid cells and the points by pairs)
+def create_data_corr(point_names, cell_index, batch_size=24):
+
+    corr_shape = (cell_index.shape[0], point_names.__len__())
+    data_corr = {
+        'points': list(point_names), 'index': cell_index, 'time': [], 'batch_size': batch_size,
+        'count': np.zeros(corr_shape, dtype=np.float64),
+        'sum_x': np.zeros(corr_shape, dtype=np.float64), 'sum_y': np.zeros(corr_shape, dtype=np.float64),
+        'sum_xx': np.zeros(corr_shape, dtype=np.float64), 'sum_yy': np.zeros(corr_shape, dtype=np.float64),
+        'sum_xy': np.zeros(corr_shape, dtype=np.float64),
+        'buffer_x': None, 'buffer_y': None, 'buffer_n': 0}
+
+    return data_corr
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to flush the buffered time steps in the correlation accumulator (cells x points matrix products)
+def flush_data_corr(data_corr, buffer_release=True):
+
+    buffer_n = data_corr['buffer_n']
+    if buffer_n > 0:
+
+        values_x, values_y = data_corr['buffer_x'][:buffer_n], data_corr['buffer_y'][:buffer_n]
+        valid_x, valid_y = np.isfinite(values_x), np.isfinite(values_y)
+        values_x, values_y = np.where(valid_x, values_x, 0.0), np.where(valid_y, values_y, 0.0)
+        valid_x, valid_y = valid_x.astype(np.float64), valid_y.astype(np.float64)
+
+        data_corr['count'] += valid_x.T @ valid_y
+        data_corr['sum_x'] += values_x.T @ valid_y
+        data_corr['sum_y'] += valid_x.T @ values_y
+        data_corr['sum_xx'] += (values_x * values_x).T @ valid_y
+        data_corr['sum_yy'] += valid_x.T @ (values_y * values_y)
+        data_corr['sum_xy'] += values_x.T @ values_y
+
+        data_corr['buffer_n'] = 0
+
+    if buffer_release:
+        data_corr['buffer_x'], data_corr['buffer_y'] = None, None
+
+    return data_corr
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to update the correlation accumulator with a grid and the synchronized point values
+def update_data_corr(data_corr, data_grid, point_values, time_step):
+
+    if isinstance(data_grid, np.ndarray):
+        values = data_grid
+    else:
+        values = data_grid.values
+
+    # time steps without point values are registered only (no cross moments to accumulate)
+    if not np.any(np.isfinite(point_values)):
+        data_corr['time'].append(pd.Timestamp(time_step))
+        return data_corr
+
+    if data_corr['buffer_x'] is None:
+        data_corr['buffer_x'] = np.zeros((data_corr['batch_size'], data_corr['index'].shape[0]), dtype=np.float64)
+        data_corr['buffer_y'] = np.zeros((data_corr['batch_size'], data_corr['points'].__len__()), dtype=np.float64)
+
+    buffer_n = data_corr['buffer_n']
+    data_corr['buffer_x'][buffer_n] = values.ravel()[data_corr['index']]
+    data_corr['buffer_y'][buffer_n] = point_values
+    data_corr['buffer_n'] = buffer_n + 1
+
+    if data_corr['buffer_n'] == data_corr['batch_size']:
+        data_corr = flush_data_corr(data_corr, buffer_release=False)
+
+    data_corr['time'].append(pd.Timestamp(time_step))
+
+    return data_corr
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to merge two correlation accumulators (the accumulators cover different time steps)
+def merge_data_corr(data_corr, data_corr_other):
+
+    if data_corr is None:
+        return data_corr_other
+    if data_corr_other is None:
+        return data_corr
+
+    if (data_corr['points'] != data_corr_other['points']) or \
+            (not np.array_equal(data_corr['index'], data_corr_other['index'])):
+        log_stream.error(' ===> Correlation accumulators are defined by different points or cells')
+        raise IOError('Correlation accumulators must be defined by the same points and cells to be merged')
+
+    data_corr = flush_data_corr(data_corr)
+    data_corr_other = flush_data_corr(data_corr_other)
+
+    for corr_key in ['count', 'sum_x', 'sum_y', 'sum_xx', 'sum_yy', 'sum_xy']:
+        data_corr[corr_key] = data_corr[corr_key] + data_corr_other[corr_key]
+    data_corr['time'] = sorted(set(data_corr['time']) | set(data_corr_other['time']))
+
+    return data_corr
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to compute the correlation maps from the accumulator (pearson coefficient by pairs of valid values)
+def compute_data_corr_maps(data_corr, data_shape, count_min=3):
+
+    data_corr = flush_data_corr(data_corr)
+
+    data_count = data_corr['count']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        data_cov = data_corr['sum_xy'] - data_corr['sum_x'] * data_corr['sum_y'] / data_count
+        data_var_x = data_corr['sum_xx'] - data_corr['sum_x'] * data_corr['sum_x'] / data_count
+        data_var_y = data_corr['sum_yy'] - data_corr['sum_y'] * data_corr['sum_y'] / data_count
+        data_r = data_cov / np.sqrt(data_var_x * data_var_y)
+    data_r[(data_count < count_min) | ~np.isfinite(data_r)] = np.nan
+    data_r = np.clip(data_r, -1.0, 1.0)
+
+    point_n = data_corr['points'].__len__()
+    corr_maps = {'correlation': np.full((point_n, data_shape[0] * data_shape[1]), np.nan, dtype=np.float32),
+                 'count': np.zeros((point_n, data_shape[0] * data_shape[1]), dtype=np.int32)}
+    corr_maps['correlation'][:, data_corr['index']] = data_r.T
+    corr_maps['count'][:, data_corr['index']] = data_count.T
+
+    corr_maps = {corr_key: corr_map.reshape(point_n, data_shape[0], data_shape[1])
+                 for corr_key, corr_map in corr_maps.items()}
+
+    return corr_maps
+# -------------------------------------------------------------------------------------
@@ -40,6 +40,18 @@ def unzip_filename(file_name_zip, file_name_unzip):
 # --------------------------------------------------------------------------------
 
 
+# --------------------------------------------------------------------------------
+# Method to unzip file into a memory buffer (without writing the unzipped file)
+def unzip_filename2buffer(file_name_zip, file_buffer):
+
+    with gzip.GzipFile(file_name_zip, "rb") as file_handle_zip:
+        file_size_unzip = file_handle_zip.readinto(file_buffer)
+
+    return file_size_unzip
+
+# --------------------------------------------------------------------------------
+
+
 # -------------------------------------------------------------------------------------
 # Method to change file extension
 def change_extension(file_in, ext_out='bin'):
@@ -56,7 +68,8 @@ def change_extension(file_in, ext_out='bin'):
 # Method to make folder
 def make_folder(path_folder):
     if not os.path.exists(path_folder):
-        os.makedirs(path_folder)
+        # the folder can be created by a concurrent process after the check
+        os.makedirs(path_folder, exist_ok=True)
 # -------------------------------------------------------------------------------------
 
 
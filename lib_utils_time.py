@@ -10,6 +10,7 @@ Version:       '1.0.0'
 # -------------------------------------------------------------------------------------
 # Libraries
 import logging
+import numpy as np
 import pandas as pd
 from datetime import date
 
@@ -143,3 +144,145 @@ def define_time_range(time_dict, time_reverse=False):
 
     return time_range, time_start, time_end
 # -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Layouts of the time strings (width, slices of the time fields and position of the separators)
+time_layouts = [
+    {'width': 12, 'fields': {'year': (0, 4), 'month': (4, 6), 'day': (6, 8), 'hour': (8, 10), 'minute': (10, 12)},
+     'separators': {}},
+    {'width': 14, 'fields': {'year': (0, 4), 'month': (4, 6), 'day': (6, 8), 'hour': (8, 10), 'minute': (10, 12),
+                             'second': (12, 14)},
+     'separators': {}},
+    {'width': 8, 'fields': {'year': (0, 4), 'month': (4, 6), 'day': (6, 8)},
+     'separators': {}},
+    {'width': 19, 'fields': {'year': (0, 4), 'month': (5, 7), 'day': (8, 10), 'hour': (11, 13), 'minute': (14, 16),
+                             'second': (17, 19)},
+     'separators': {4: b'-', 7: b'-', 10: b' T', 13: b':', 16: b':'}},
+    {'width': 16, 'fields': {'year': (0, 4), 'month': (5, 7), 'day': (8, 10), 'hour': (11, 13), 'minute': (14, 16)},
+     'separators': {4: b'-', 7: b'-', 10: b' T', 13: b':'}},
+    {'width': 10, 'fields': {'year': (0, 4), 'month': (5, 7), 'day': (8, 10)},
+     'separators': {4: b'-', 7: b'-'}},
+    # matlab datestr default format (dd-mmm-yyyy HH:MM:SS)
+    {'width': 20, 'fields': {'day': (0, 2), 'month_name': (3, 6), 'year': (7, 11), 'hour': (12, 14),
+                             'minute': (15, 17), 'second': (18, 20)},
+     'separators': {2: b'-', 6: b'-', 11: b' ', 14: b':', 17: b':'}},
+]
+time_month_names = [b'Jan', b'Feb', b'Mar', b'Apr', b'May', b'Jun', b'Jul', b'Aug', b'Sep', b'Oct', b'Nov', b'Dec']
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to decode the time fields of the time strings using the layout (none if the layout is not consistent)
+def decode_time_layout(time_bytes, time_layout):
+
+    if time_bytes.shape[1] != time_layout['width']:
+        return None
+
+    for sep_pos, sep_chars in time_layout['separators'].items():
+        if not np.all(np.isin(time_bytes[:, sep_pos], np.frombuffer(sep_chars, dtype=np.uint8))):
+            return None
+
+    time_fields = {}
+    for field_name, (field_start, field_end) in time_layout['fields'].items():
+        field_bytes = time_bytes[:, field_start:field_end]
+        if field_name == 'month_name':
+            month_codes = field_bytes.astype(np.int64) @ np.array([1 << 16, 1 << 8, 1], dtype=np.int64)
+            month_lut = np.array([int.from_bytes(month_name, 'big') for month_name in time_month_names])
+            month_order = np.argsort(month_lut)
+            month_pos = np.clip(np.searchsorted(month_lut[month_order], month_codes), 0, month_lut.shape[0] - 1)
+            if not np.all(month_lut[month_order][month_pos] == month_codes):
+                return None
+            time_fields['month'] = month_order[month_pos] + 1
+        else:
+            field_digits = field_bytes.astype(np.int64) - 48
+            if np.any((field_digits < 0) | (field_digits > 9)):
+                return None
+            time_fields[field_name] = field_digits @ (10 ** np.arange(field_end - field_start - 1, -1, -1))
+
+    return time_fields
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to convert the time fields to datetime64 values (none if the fields are not valid)
+def convert_time_fields(time_fields):
+
+    time_n = time_fields['year'].shape[0]
+    time_zeros = np.zeros(time_n, dtype=np.int64)
+    year, month, day = time_fields['year'], time_fields['month'], time_fields['day']
+    hour = time_fields.get('hour', time_zeros)
+    minute, second = time_fields.get('minute', time_zeros), time_fields.get('second', time_zeros)
+
+    if np.any((month < 1) | (month > 12)) or np.any((hour > 23) | (minute > 59) | (second > 59)):
+        return None
+
+    time_month = (year - 1970) * 12 + (month - 1)
+    time_month_start = time_month.astype('datetime64[M]').astype('datetime64[D]')
+    time_month_days = (time_month + 1).astype('datetime64[M]').astype('datetime64[D]') - time_month_start
+    if np.any((day < 1) | (day > time_month_days.astype(np.int64))):
+        return None
+
+    time_values = time_month_start.astype('datetime64[s]') + ((day - 1) * 86400 + hour * 3600 + minute * 60 + second)
+
+    return time_values
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to decode the time values of the point files (layout detected once for each file: fixed format strings or
+# char matrix by byte slicing, matlab datenum by arithmetic; format inference otherwise)
+def decode_time_values(time_values, time_datenum_epoch=719529.0, time_datenum_range=(693962.0, 767011.0)):
+
+    time_values = np.asarray(time_values)
+
+    if np.issubdtype(time_values.dtype, np.number) and (time_values.size > 0):
+        time_days = time_values.astype(np.float64).ravel()
+        if not np.all(np.isfinite(time_days)):
+            log_stream.error(' ===> Time values are not finite')
+            raise IOError('Time values must be finite to correctly decode the time information')
+
+        # matlab datenum (days from year 0; 719529 is 1970-01-01; range from 1900-01-01 to 2100-01-01)
+        if np.all((time_days >= time_datenum_range[0]) & (time_days < time_datenum_range[1])):
+            time_seconds = np.round((time_days - time_datenum_epoch) * 86400.0).astype(np.int64)
+            return pd.DatetimeIndex(time_seconds.astype('datetime64[s]').astype('datetime64[ns]'))
+
+        # numeric time strings (e.g. 201701010000 or 20170101) decoded by the layouts of the strings
+        if np.all((time_days >= 0) & (time_days == np.floor(time_days)) & (time_days < 1e15)):
+            time_values = time_days.astype(np.int64).astype(str)
+        else:
+            log_stream.error(' ===> Time values are not matlab datenum or numeric time strings')
+            raise IOError('Time values format is not supported')
+
+    # char matrix (one char for each element) or fixed width strings
+    if (time_values.dtype.kind == 'U') and (time_values.ndim == 2) and (time_values.dtype.itemsize == 4):
+        time_values = np.ascontiguousarray(time_values).view('<U' + str(time_values.shape[1])).ravel()
+    time_values = time_values.ravel()
+
+    if (time_values.dtype.kind in ['U', 'S']) and (time_values.size > 0):
+        # strings as they are and, if no layout is detected, without the leading and trailing blanks
+        for time_strip in [False, True]:
+
+            time_strings = time_values
+            if time_strip:
+                time_strings = np.char.strip(time_values)
+                time_strings = time_strings.astype(
+                    time_strings.dtype.kind + str(max(int(np.char.str_len(time_strings).max()), 1)))
+
+            # char codes of the strings [time, chars] (unicode code points or bytes)
+            time_strings = np.ascontiguousarray(time_strings)
+            if time_strings.dtype.kind == 'U':
+                time_bytes = time_strings.view(np.uint32).reshape(time_strings.shape[0], -1)
+            else:
+                time_bytes = time_strings.view(np.uint8).reshape(time_strings.shape[0], -1)
+
+            for time_layout in time_layouts:
+                time_fields = decode_time_layout(time_bytes, time_layout)
+                if time_fields is not None:
+                    time_decoded = convert_time_fields(time_fields)
+                    if time_decoded is not None:
+                        return pd.DatetimeIndex(time_decoded.astype('datetime64[ns]'))
+
+    # layout not detected (format inferred for each element)
+    return pd.DatetimeIndex(time_values)
+# -------------------------------------------------------------------------------------